@@ -0,0 +1,17 @@
+-- Migration 005: Agrupamento de produtos quase duplicados
+-- Data: 2026-10-19
+-- Autor: Sem Susto Team
+--
+-- O catálogo do OpenFoodFacts tem o mesmo produto com GTINs diferentes
+-- ou pequenas variações de nome. O script agrupar_duplicatas.py gera o
+-- mapeamento codigo_barras → cluster_id, importado pelo init_db.py.
+-- NULL significa que o produto não tem duplicatas conhecidas.
+
+ALTER TABLE produtos ADD COLUMN IF NOT EXISTS cluster_id VARCHAR(50);
+
+-- Permite listar rapidamente todas as variações de um mesmo produto
+CREATE INDEX IF NOT EXISTS idx_produtos_cluster_id
+ON produtos (cluster_id)
+WHERE cluster_id IS NOT NULL;
+
+COMMENT ON COLUMN produtos.cluster_id IS 'GTIN canônico do grupo de quase duplicatas (NULL se único)';
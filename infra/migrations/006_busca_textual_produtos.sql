@@ -0,0 +1,102 @@
+-- Migration 006: Busca textual sem acentos com fallback por trigramas
+-- Data: 2026-10-19
+-- Autor: Sem Susto Team
+--
+-- Substitui o índice de expressão to_tsvector('portuguese', descricao) da
+-- migration 001, que ignorava a marca, não encontrava consultas digitadas sem
+-- acento ("cafe pilao") nem com erro de digitação ("leite itlac") e
+-- recalculava o tsvector a cada consulta que precisava de ranking (ts_rank).
+--
+-- Layouts comparados com scripts/benchmark_busca.py (relatório completo em
+-- .metadocs/benchmark_busca.md; 150k produtos de um catálogo SINTÉTICO, pois o
+-- produtos_higienizados.json real não estava disponível na medição;
+-- 10 consultas x 200 repetições; recall@20 contra o gabarito do catálogo):
+--
+--   layout      carga   índices   p50      p99      recall@20
+--   expressao    5.6s   10.7 MB    2.0ms   27.9ms   41%
+--   gerada       5.9s   11.7 MB    4.5ms    9.9ms   44%
+--   trigrama     8.4s   21.1 MB   39.8ms  450.8ms   68%
+--   hibrida     10.6s   28.0 MB    8.2ms   34.1ms   94%   <- adotado
+--
+-- "expressao" e "gerada" têm o menor p50 em parte porque não encontram nada
+-- em 5 das 10 consultas (sem acento ou com erro de digitação): um lookup GIN
+-- vazio é barato. "hibrida" = tsvector armazenado com a configuração
+-- portuguese_sem_acentos (unaccent + stemmer, descricao peso A + marca
+-- peso B) e, quando o Full Text Search não acha nada, fallback para
+-- word_similarity no índice de trigramas. Custa ~80% a mais de carga e 2.4x
+-- o espaço de índice da "gerada"; o p99 vem das consultas que caem no
+-- fallback. Erros de digitação continuam parciais ("leite itlac": 45%).
+-- Rodar o benchmark de novo com o catálogo real antes de ajustar limiares.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() é STABLE (depende do search_path); fixar o dicionário permite
+-- usar a função em índices de expressão
+CREATE OR REPLACE FUNCTION sem_acentos(texto text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_sem_acentos') THEN
+        CREATE TEXT SEARCH CONFIGURATION portuguese_sem_acentos (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION portuguese_sem_acentos
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+
+ALTER TABLE produtos ADD COLUMN IF NOT EXISTS busca tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('portuguese_sem_acentos', coalesce(descricao, '')), 'A') ||
+    setweight(to_tsvector('portuguese_sem_acentos', coalesce(marca, '')), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_produtos_busca
+ON produtos
+USING GIN (busca);
+
+-- Fallback tolerante a erros de digitação (descricao + marca, sem acentos)
+CREATE INDEX IF NOT EXISTS idx_produtos_busca_trgm
+ON produtos
+USING GIN (sem_acentos(descricao || ' ' || marca) gin_trgm_ops);
+
+-- O índice de expressão fica redundante com a coluna gerada
+DROP INDEX IF EXISTS idx_produtos_descricao_fts;
+
+-- Ponto único de busca para a aplicação: o ramo de trigramas só roda quando
+-- o Full Text Search não encontra nada
+CREATE OR REPLACE FUNCTION buscar_produtos(consulta text, limite integer DEFAULT 20)
+RETURNS SETOF produtos
+LANGUAGE sql STABLE
+AS $$
+    WITH fts AS (
+        SELECT p.codigo_barras, ts_rank(p.busca, q) AS pontuacao
+        FROM produtos p, plainto_tsquery('portuguese_sem_acentos', consulta) q
+        WHERE p.busca @@ q
+        ORDER BY pontuacao DESC
+        LIMIT limite
+    ),
+    trigramas AS (
+        SELECT p.codigo_barras,
+               word_similarity(sem_acentos(consulta), sem_acentos(p.descricao || ' ' || p.marca)) AS pontuacao
+        FROM produtos p
+        WHERE NOT EXISTS (SELECT 1 FROM fts)
+          AND sem_acentos(consulta) <% sem_acentos(p.descricao || ' ' || p.marca)
+        ORDER BY pontuacao DESC
+        LIMIT limite
+    ),
+    escolhidos AS (
+        SELECT * FROM fts
+        UNION ALL
+        SELECT * FROM trigramas
+    )
+    SELECT p.*
+    FROM escolhidos e
+    JOIN produtos p USING (codigo_barras)
+    ORDER BY e.pontuacao DESC
+$$;
+
+COMMENT ON COLUMN produtos.busca IS 'tsvector armazenado sem acentos (descricao peso A + marca peso B) para Full Text Search';
+COMMENT ON FUNCTION buscar_produtos(text, integer) IS 'Full Text Search sem acentos com fallback por trigramas (erros de digitação)';
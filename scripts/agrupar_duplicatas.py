@@ -0,0 +1,396 @@
+"""
+Detecta produtos quase duplicados no catálogo higienizado (blocking + MinHash/LSH).
+
+O subconjunto brasileiro do OpenFoodFacts tem muitos produtos iguais com GTINs
+diferentes ou pequenas variações de nome ("Leite Integral Italac 1L" vs
+"Leite Italac Integral"). Comparar todos os pares é quadrático; aqui o custo
+fica próximo de linear:
+
+1. **Blocking**: só comparamos produtos com a mesma chave ``marca + tamanho``
+   normalizados. Produtos "Sem Marca" não são agrupados (risco alto de falso positivo).
+2. **MinHash**: cada nome vira um conjunto de shingles (trigramas de caracteres)
+   resumido em ``NUM_PERMUTACOES`` valores mínimos.
+3. **LSH**: as assinaturas são divididas em bandas; todos os pares de produtos
+   que colidem em alguma banda viram candidatos, e só estes têm a similaridade
+   de Jaccard estimada. Baldes com mais de ``MAX_POR_BALDE`` produtos são
+   ignorados naquela banda (custo quadrático; as outras bandas ainda valem).
+   Os baldes ignorados e os pares que deixaram de ser comparados entram nas
+   métricas: um número alto indica duplicatas possivelmente perdidas.
+4. **Union-Find**: pares acima do limiar são unidos em clusters.
+
+Saída: ``clusters_produtos.json`` com ``codigo_barras → cluster_id`` (o
+``cluster_id`` é o GTIN canônico do grupo: o menor código) e as métricas de
+execução (tempo e pico de memória do processo).
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Dentro do container, depois do clean_dataset.py
+    python scripts/agrupar_duplicatas.py --limiar 0.7
+
+    # Registra tempo e memória no relatório versionado
+    python scripts/agrupar_duplicatas.py --relatorio .metadocs/agrupamento_duplicatas.md
+
+.. note::
+   O mapeamento só contém produtos que pertencem a algum cluster com 2+ itens.
+   Produtos ausentes são o próprio canônico.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import time
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, List, Tuple
+
+from medicao import formatar_bytes
+from texto import dobrar_acentos
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+DATASET_FILE = "produtos_higienizados.json"
+OUTPUT_FILE = "clusters_produtos.json"
+
+NUM_PERMUTACOES = 64
+NUM_BANDAS = 16  # 16 bandas x 4 linhas: limiar de colisão ≈ (1/16)^(1/4) ≈ 0.5
+LIMIAR_PADRAO = 0.7
+TAMANHO_SHINGLE = 3
+
+# Baldes LSH maiores que isso geram pares demais e são ignorados na banda
+MAX_POR_BALDE = 200
+
+# Primo de Mersenne 2^61 - 1 para o hashing universal (a*x + b) mod p
+PRIMO = (1 << 61) - 1
+MASCARA_32 = (1 << 32) - 1
+
+MARCAS_IGNORADAS = {"sem marca", "generica", "generico"}
+
+REGEX_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9 ]+")
+
+
+def gerar_coeficientes(quantidade: int, semente: int = 42) -> List[Tuple[int, int]]:
+    """
+    Gera coeficientes ``(a, b)`` determinísticos para as funções de hash.
+
+    Usa SHA-256 em vez de ``random`` para que a mesma semente produza os
+    mesmos clusters em qualquer versão do Python.
+
+    :param quantidade: Número de funções de hash (permutações)
+    :param semente: Semente para reprodutibilidade
+    :return: Lista de pares ``(a, b)``
+    """
+    coeficientes = []
+    for i in range(quantidade):
+        digest = hashlib.sha256(f"{semente}:{i}".encode()).digest()
+        a, b = struct.unpack("<QQ", digest[:16])
+        coeficientes.append(((a % (PRIMO - 1)) + 1, b % PRIMO))
+    return coeficientes
+
+
+COEFICIENTES = gerar_coeficientes(NUM_PERMUTACOES)
+
+
+def normalizar_nome(descricao: str, marca: str, tamanho: str) -> str:
+    """
+    Normaliza o nome para comparação: sem acentos, sem marca e sem tamanho.
+
+    Marca e tamanho já fazem parte da chave de blocking, então removê-los do
+    nome evita que dominem a similaridade.
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        normalizar_nome("Leite Integral Italac 1L", "Italac", "1L")
+        # Output: 'integral leite'
+
+    :return: Palavras ordenadas (ordem não importa: "Leite Italac Integral" == "Leite Integral Italac")
+    """
+    texto = REGEX_NAO_ALFANUMERICO.sub(" ", dobrar_acentos(descricao))
+    removidas = set(dobrar_acentos(marca).split()) | {dobrar_acentos(tamanho)}
+    palavras = sorted(p for p in texto.split() if p not in removidas)
+    return " ".join(palavras)
+
+
+def chave_blocking(produto: dict):
+    """
+    Calcula a chave de blocking ``marca|tamanho`` de um produto.
+
+    :param produto: Produto higienizado
+    :return: Chave normalizada ou None se o produto não deve ser agrupado
+    """
+    marca = dobrar_acentos(produto.get("marca") or "").strip()
+    if not marca or marca in MARCAS_IGNORADAS:
+        return None
+    tamanho = dobrar_acentos(produto.get("tamanho") or "").replace(" ", "")
+    return f"{marca}|{tamanho}"
+
+
+def shingles(texto: str) -> set:
+    """
+    Gera os shingles (n-gramas de caracteres) de um texto como inteiros de 32 bits.
+
+    :param texto: Nome normalizado
+    :return: Conjunto de hashes dos shingles
+    """
+    if len(texto) < TAMANHO_SHINGLE:
+        texto = texto.ljust(TAMANHO_SHINGLE)
+    return {
+        int.from_bytes(hashlib.blake2b(texto[i:i + TAMANHO_SHINGLE].encode(), digest_size=4).digest(), "little")
+        for i in range(len(texto) - TAMANHO_SHINGLE + 1)
+    }
+
+
+_HASHES_POR_SHINGLE: Dict[int, Tuple[int, ...]] = {}
+
+
+def hashes_do_shingle(x: int) -> Tuple[int, ...]:
+    """
+    Aplica as ``NUM_PERMUTACOES`` funções de hash a um shingle (com memorização).
+
+    O vocabulário de trigramas é pequeno comparado ao catálogo, então cada
+    shingle só é permutado uma vez durante toda a execução.
+    """
+    hashes = _HASHES_POR_SHINGLE.get(x)
+    if hashes is None:
+        hashes = tuple(((a * x + b) % PRIMO) & MASCARA_32 for a, b in COEFICIENTES)
+        _HASHES_POR_SHINGLE[x] = hashes
+    return hashes
+
+
+def assinatura_minhash(conjunto: set) -> Tuple[int, ...]:
+    """
+    Calcula a assinatura MinHash de um conjunto de shingles.
+
+    :param conjunto: Shingles do nome
+    :return: Tupla com ``NUM_PERMUTACOES`` valores mínimos
+    """
+    return tuple(map(min, zip(*(hashes_do_shingle(x) for x in conjunto))))
+
+
+def similaridade_estimada(assinatura_a: Tuple[int, ...], assinatura_b: Tuple[int, ...]) -> float:
+    """Estimativa de Jaccard: fração de posições iguais nas assinaturas."""
+    iguais = sum(1 for x, y in zip(assinatura_a, assinatura_b) if x == y)
+    return iguais / len(assinatura_a)
+
+
+class UniaoBusca:
+    """
+    Estrutura Union-Find (com compressão de caminho) para montar os clusters.
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        uniao = UniaoBusca()
+        uniao.unir("789001", "789002")
+        uniao.raiz("789002")  # Output: '789001'
+    """
+
+    def __init__(self):
+        self.pai: Dict[str, str] = {}
+
+    def raiz(self, item: str) -> str:
+        """Retorna o representante do grupo de ``item``."""
+        self.pai.setdefault(item, item)
+        while self.pai[item] != item:
+            self.pai[item] = self.pai[self.pai[item]]
+            item = self.pai[item]
+        return item
+
+    def unir(self, a: str, b: str):
+        """Une os grupos de ``a`` e ``b``; o menor código vira o representante."""
+        raiz_a, raiz_b = self.raiz(a), self.raiz(b)
+        if raiz_a == raiz_b:
+            return
+        if raiz_b < raiz_a:
+            raiz_a, raiz_b = raiz_b, raiz_a
+        self.pai[raiz_b] = raiz_a
+
+
+def agrupar(produtos: list, limiar: float) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """
+    Encontra clusters de quase duplicatas.
+
+    :param produtos: Lista de produtos higienizados
+    :param limiar: Similaridade de Jaccard mínima (0-1) para considerar duplicata
+    :return: Mapeamento ``codigo_barras → cluster_id`` (apenas clusters com 2+ itens)
+        e contadores do LSH (``baldes_ignorados``, ``pares_nao_comparados``)
+    """
+    linhas_por_banda = NUM_PERMUTACOES // NUM_BANDAS
+
+    blocos = defaultdict(list)
+    for produto in produtos:
+        chave = chave_blocking(produto)
+        if chave:
+            blocos[chave].append(produto)
+
+    uniao = UniaoBusca()
+    ignorados = {"baldes_ignorados": 0, "pares_nao_comparados": 0}
+    for membros in blocos.values():
+        if len(membros) < 2:
+            continue
+
+        # Nomes idênticos após normalização: união direta, sem MinHash
+        assinaturas = {}
+        por_nome = {}
+        for produto in membros:
+            codigo = str(produto["codigo_barras"])
+            nome = normalizar_nome(produto["descricao"], produto.get("marca", ""), produto.get("tamanho", ""))
+            if nome in por_nome:
+                uniao.unir(por_nome[nome], codigo)
+                continue
+            por_nome[nome] = codigo
+            assinaturas[codigo] = assinatura_minhash(shingles(nome))
+
+        if len(assinaturas) < 2:
+            continue
+
+        # LSH: produtos com a mesma banda caem no mesmo balde
+        candidatos = set()
+        for banda in range(NUM_BANDAS):
+            inicio = banda * linhas_por_banda
+            baldes = defaultdict(list)
+            for codigo, assinatura in assinaturas.items():
+                baldes[assinatura[inicio:inicio + linhas_por_banda]].append(codigo)
+            for balde in baldes.values():
+                if len(balde) > MAX_POR_BALDE:
+                    ignorados["baldes_ignorados"] += 1
+                    ignorados["pares_nao_comparados"] += len(balde) * (len(balde) - 1) // 2
+                    continue
+                for a, b in combinations(sorted(balde), 2):
+                    candidatos.add((a, b))
+
+        for a, b in candidatos:
+            if similaridade_estimada(assinaturas[a], assinaturas[b]) >= limiar:
+                uniao.unir(a, b)
+
+    # Só exporta quem tem grupo com mais de um membro
+    tamanhos = defaultdict(int)
+    for codigo in uniao.pai:
+        tamanhos[uniao.raiz(codigo)] += 1
+    mapeamento = {
+        codigo: uniao.raiz(codigo)
+        for codigo in sorted(uniao.pai)
+        if tamanhos[uniao.raiz(codigo)] > 1
+    }
+    return mapeamento, ignorados
+
+
+def pico_memoria_processo() -> int:
+    """
+    Pico de memória residente (RSS) do processo em bytes.
+
+    Usa ``resource`` em vez de ``tracemalloc`` para não distorcer o tempo
+    medido. Retorna 0 em plataformas sem o módulo (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def gravar_relatorio(caminho: str, dataset: str, metricas: dict):
+    """
+    Grava as métricas da execução em Markdown (tempo, memória e cobertura do LSH).
+
+    :param caminho: Arquivo de saída
+    :param dataset: Arquivo do catálogo usado
+    :param metricas: Métricas calculadas pelo ``main``
+    """
+    linhas = [
+        "# Agrupamento de Quase Duplicatas - produtos",
+        "",
+        f"> Gerado por `scripts/agrupar_duplicatas.py` em {time.strftime('%Y-%m-%d %H:%M')}.",
+        f"> `{os.path.basename(dataset)}`: {metricas['produtos']} produtos, limiar {metricas['limiar']}, "
+        f"{NUM_PERMUTACOES} permutações em {NUM_BANDAS} bandas, MAX_POR_BALDE={MAX_POR_BALDE}.",
+        "",
+        "| Métrica | Valor |",
+        "| ------- | ----- |",
+        f"| Tempo | {metricas['tempo_segundos']:.1f}s |",
+        f"| Pico de memória (RSS) | {formatar_bytes(metricas['pico_memoria_bytes'])} |",
+        f"| Produtos em clusters | {metricas['produtos_agrupados']} |",
+        f"| Clusters | {metricas['clusters']} |",
+        f"| Baldes LSH ignorados | {metricas['baldes_ignorados']} |",
+        f"| Pares não comparados | {metricas['pares_nao_comparados']} |",
+    ]
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("\n".join(linhas) + "\n")
+
+
+def processar(dataset_file: str = DATASET_FILE, output_file: str = OUTPUT_FILE,
+              limiar: float = LIMIAR_PADRAO) -> dict:
+    """
+    Agrupa as quase duplicatas do dataset e grava o mapeamento com as métricas.
+
+    Usado pelo ``main`` e pela etapa ``agrupar`` do ``pipeline.py``.
+
+    :param dataset_file: JSON higienizado
+    :param output_file: JSON de clusters
+    :param limiar: Similaridade de Jaccard mínima (0-1)
+    :return: Métricas da execução
+    """
+    print("🧬 Iniciando detecção de quase duplicatas...")
+    with open(dataset_file, "r", encoding="utf-8") as f:
+        produtos = json.load(f)
+
+    inicio = time.perf_counter()
+    mapeamento, ignorados = agrupar(produtos, limiar)
+    duracao = time.perf_counter() - inicio
+    pico_memoria = pico_memoria_processo()
+
+    total_clusters = len(set(mapeamento.values()))
+    metricas = {
+        "produtos": len(produtos),
+        "produtos_agrupados": len(mapeamento),
+        "clusters": total_clusters,
+        "limiar": limiar,
+        "tempo_segundos": round(duracao, 3),
+        "pico_memoria_bytes": pico_memoria,
+        **ignorados,
+    }
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump({"metricas": metricas, "clusters": mapeamento}, f, indent=2, ensure_ascii=False)
+
+    print(f"   📊 Produtos: {len(produtos)} | Em clusters: {len(mapeamento)} | Clusters: {total_clusters}")
+    print(f"   ⏱️ Tempo: {duracao:.1f}s | 💾 Pico de memória: {formatar_bytes(pico_memoria)}")
+    if ignorados["baldes_ignorados"]:
+        print(f"   ⚠️ {ignorados['baldes_ignorados']} balde(s) LSH com mais de {MAX_POR_BALDE} produtos ignorados "
+              f"({ignorados['pares_nao_comparados']} pares não comparados): duplicatas podem ter ficado de fora.")
+    return metricas
+
+
+def main():
+    """Função principal do agrupamento de duplicatas."""
+    parser = argparse.ArgumentParser(description="Detectar produtos quase duplicados")
+    parser.add_argument("--dataset", default=DATASET_FILE, help="JSON higienizado")
+    parser.add_argument("--saida", default=OUTPUT_FILE, help="JSON de clusters")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO, help="Jaccard mínimo (0-1)")
+    parser.add_argument("--relatorio", default=None, help="Markdown com as métricas da execução")
+    argumentos = parser.parse_args()
+
+    if not os.path.exists(argumentos.dataset):
+        print(f"❌ Arquivo {argumentos.dataset} não encontrado. Rode o clean_dataset.py antes.")
+        sys.exit(1)
+
+    metricas = processar(argumentos.dataset, argumentos.saida, argumentos.limiar)
+    if argumentos.relatorio:
+        gravar_relatorio(argumentos.relatorio, argumentos.dataset, metricas)
+        print(f"   📝 Relatório salvo em {argumentos.relatorio}")
+    print(f"✅ Mapeamento salvo em {argumentos.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+Benchmark dos layouts de busca textual da tabela produtos.
+
+Carrega o catálogo higienizado em um schema temporário do Postgres local e
+compara latência (p50/p95/p99) **e recall** de consultas representativas em
+quatro layouts:
+
+- **expressao**: índice GIN em ``to_tsvector('portuguese', descricao)``
+  (layout original da migration 001). Ignora a marca e recalcula o
+  tsvector para o ``ts_rank``.
+- **gerada**: coluna ``tsvector`` armazenada (``GENERATED ... STORED``)
+  com descricao + marca e índice GIN.
+- **trigrama**: índice GIN ``gin_trgm_ops`` no texto sem acentos
+  (descricao + marca), com ``<%`` e ``word_similarity`` — tolera erros de
+  digitação.
+- **hibrida**: coluna ``tsvector`` gerada com a configuração
+  ``portuguese_sem_acentos`` (``unaccent`` + stemmer) e, quando o Full Text
+  Search não encontra nada, fallback para o índice de trigramas (layout da
+  migration 006).
+
+Latência sozinha engana: um lookup GIN que não encontra nada é barato. Por
+isso cada consulta tem a **intenção** (a grafia correta) e o benchmark
+calcula, a partir do próprio catálogo, quais produtos são relevantes
+(contêm todas as palavras da intenção, sem acentos). O recall@N é a fração
+dos ``min(N, relevantes)`` melhores resultados possíveis que o layout
+devolveu.
+
+Também mede o tempo de carga de cada layout (custo de manter o índice no
+INSERT) e o espaço ocupado pela tabela e pelos índices.
+O relatório em Markdown é gravado em ``.metadocs/benchmark_busca.md``.
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Dentro do container, com o Postgres de desenvolvimento no ar
+    python scripts/benchmark_busca.py --repeticoes 200
+
+.. note::
+   Tudo é criado no schema ``benchmark_busca``, removido ao final
+   (use ``--manter`` para inspecionar as tabelas). As extensões
+   ``unaccent`` e ``pg_trgm`` que ainda não existirem no banco são criadas
+   dentro desse schema e saem junto com ele; as que já existiam são apenas
+   usadas.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from medicao import percentis, formatar_ms, formatar_bytes
+from texto import dobrar_acentos
+
+try:
+    import psycopg2
+    from psycopg2.extras import execute_values
+except ImportError:
+    print("❌ psycopg2 não encontrado. Instale com: pip install psycopg2-binary")
+    sys.exit(1)
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+DATASET_FILE = "produtos_higienizados.json"
+RELATORIO_FILE = ".metadocs/benchmark_busca.md"
+SCHEMA = "benchmark_busca"
+LIMITE_RESULTADOS = 20
+EXTENSOES = ("unaccent", "pg_trgm")
+
+# Consulta digitada → intenção (grafia correta, usada só para medir o recall).
+# Cobre nome simples, nome + marca, falta de acentos e erros de digitação.
+CONSULTAS = {
+    "leite integral": "leite integral",
+    "arroz tio joao": "arroz tio joão",
+    "cafe pilao": "café pilão",
+    "biscoito recheado": "biscoito recheado",
+    "refrigerante coca cola": "refrigerante coca cola",
+    "chocolate nestle": "chocolate nestlé",
+    "sabao em po": "sabão pó",
+    "macarrao espaguete": "macarrão espaguete",
+    "leite itlac": "leite italac",
+    "bolaxa maizena": "bolacha maizena",
+}
+
+REGEX_PALAVRA = re.compile(r"[a-z0-9]+")
+
+# Objetos auxiliares criados no schema do benchmark (mesmos da migration 006).
+# {unaccent} é o schema onde a extensão unaccent está instalada.
+DDL_AUXILIAR = """
+    CREATE FUNCTION {schema}.sem_acentos(texto text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT lower({unaccent}.unaccent('{unaccent}.unaccent'::regdictionary, texto)) $$;
+
+    CREATE TEXT SEARCH CONFIGURATION {schema}.portuguese_sem_acentos (COPY = portuguese);
+    ALTER TEXT SEARCH CONFIGURATION {schema}.portuguese_sem_acentos
+        ALTER MAPPING FOR hword, hword_part, word WITH {unaccent}.unaccent, portuguese_stem;
+"""
+
+LAYOUTS = {
+    "expressao": {
+        "ddl": """
+            CREATE TABLE {tabela} (
+                codigo_barras VARCHAR(50) PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                marca VARCHAR(50) NOT NULL
+            );
+            CREATE INDEX ON {tabela} USING GIN (to_tsvector('portuguese', descricao));
+        """,
+        "consulta": """
+            SELECT codigo_barras
+            FROM {tabela}, plainto_tsquery('portuguese', %(q)s) q
+            WHERE to_tsvector('portuguese', descricao) @@ q
+            ORDER BY ts_rank(to_tsvector('portuguese', descricao), q) DESC
+            LIMIT %(limite)s
+        """,
+    },
+    "gerada": {
+        "ddl": """
+            CREATE TABLE {tabela} (
+                codigo_barras VARCHAR(50) PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                marca VARCHAR(50) NOT NULL,
+                busca tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'A') ||
+                    setweight(to_tsvector('portuguese', coalesce(marca, '')), 'B')
+                ) STORED
+            );
+            CREATE INDEX ON {tabela} USING GIN (busca);
+        """,
+        "consulta": """
+            SELECT codigo_barras
+            FROM {tabela}, plainto_tsquery('portuguese', %(q)s) q
+            WHERE busca @@ q
+            ORDER BY ts_rank(busca, q) DESC
+            LIMIT %(limite)s
+        """,
+    },
+    "trigrama": {
+        "ddl": """
+            CREATE TABLE {tabela} (
+                codigo_barras VARCHAR(50) PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                marca VARCHAR(50) NOT NULL
+            );
+            CREATE INDEX ON {tabela} USING GIN ({schema}.sem_acentos(descricao || ' ' || marca) gin_trgm_ops);
+        """,
+        "consulta": """
+            SELECT codigo_barras
+            FROM {tabela}
+            WHERE {schema}.sem_acentos(%(q)s) <%% {schema}.sem_acentos(descricao || ' ' || marca)
+            ORDER BY word_similarity({schema}.sem_acentos(%(q)s), {schema}.sem_acentos(descricao || ' ' || marca)) DESC
+            LIMIT %(limite)s
+        """,
+    },
+    "hibrida": {
+        "ddl": """
+            CREATE TABLE {tabela} (
+                codigo_barras VARCHAR(50) PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                marca VARCHAR(50) NOT NULL,
+                busca tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('{schema}.portuguese_sem_acentos', coalesce(descricao, '')), 'A') ||
+                    setweight(to_tsvector('{schema}.portuguese_sem_acentos', coalesce(marca, '')), 'B')
+                ) STORED
+            );
+            CREATE INDEX ON {tabela} USING GIN (busca);
+            CREATE INDEX ON {tabela} USING GIN ({schema}.sem_acentos(descricao || ' ' || marca) gin_trgm_ops);
+        """,
+        # O ramo de trigramas só roda quando o Full Text Search não achou nada
+        # (o NOT EXISTS vira um filtro de execução única no plano)
+        "consulta": """
+            WITH fts AS (
+                SELECT codigo_barras, ts_rank(busca, q) AS pontuacao
+                FROM {tabela}, plainto_tsquery('{schema}.portuguese_sem_acentos', %(q)s) q
+                WHERE busca @@ q
+                ORDER BY pontuacao DESC
+                LIMIT %(limite)s
+            )
+            SELECT codigo_barras FROM fts
+            UNION ALL
+            (
+                SELECT codigo_barras
+                FROM {tabela}
+                WHERE NOT EXISTS (SELECT 1 FROM fts)
+                  AND {schema}.sem_acentos(%(q)s) <%% {schema}.sem_acentos(descricao || ' ' || marca)
+                ORDER BY word_similarity({schema}.sem_acentos(%(q)s), {schema}.sem_acentos(descricao || ' ' || marca)) DESC
+                LIMIT %(limite)s
+            )
+        """,
+    },
+}
+
+
+def palavras(texto: str) -> List[str]:
+    """Palavras sem acentos e em minúsculas (mesma normalização do autocomplete)."""
+    return REGEX_PALAVRA.findall(dobrar_acentos(texto or ""))
+
+
+def produtos_relevantes(valores: list, intencao: str) -> Set[str]:
+    """
+    Calcula o gabarito de uma consulta: produtos que contêm todas as palavras
+    da intenção (como palavra inteira ou prefixo, para aceitar plurais).
+
+    :param valores: Tuplas ``(codigo_barras, descricao, marca)``
+    :param intencao: Grafia correta da consulta
+    :return: Códigos de barras relevantes
+    """
+    termos = palavras(intencao)
+    relevantes = set()
+    for codigo, descricao, marca in valores:
+        texto = palavras(f"{descricao} {marca}")
+        if all(any(p.startswith(t) for p in texto) for t in termos):
+            relevantes.add(codigo)
+    return relevantes
+
+
+def recall(devolvidos: List[str], relevantes: Set[str], limite: int) -> Optional[float]:
+    """
+    Recall@limite: acertos sobre o máximo de acertos possível.
+
+    :return: Valor entre 0 e 1, ou None se a consulta não tem gabarito
+    """
+    if not relevantes:
+        return None
+    acertos = sum(1 for codigo in devolvidos if codigo in relevantes)
+    return acertos / min(limite, len(relevantes))
+
+
+def preparar_schema(conn) -> Dict[str, str]:
+    """
+    Cria o schema descartável com as extensões e objetos auxiliares.
+
+    Extensões já instaladas no banco são reaproveitadas; as que faltam são
+    criadas **dentro** do schema do benchmark, para que o ``DROP SCHEMA ...
+    CASCADE`` do final as remova também.
+
+    :param conn: Conexão ativa com o banco
+    :return: Schema de cada extensão
+    """
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+
+    schemas = {}
+    for extensao in EXTENSOES:
+        cur.execute(
+            "SELECT extnamespace::regnamespace::text FROM pg_extension WHERE extname = %s",
+            (extensao,),
+        )
+        linha = cur.fetchone()
+        if linha:
+            schemas[extensao] = linha[0]
+        else:
+            cur.execute(f"CREATE EXTENSION {extensao} SCHEMA {SCHEMA}")
+            schemas[extensao] = SCHEMA
+
+    cur.execute(DDL_AUXILIAR.format(schema=SCHEMA, unaccent=schemas["unaccent"]))
+    # Operadores e classes de operador do pg_trgm resolvidos pelo search_path
+    cur.execute(f"SET search_path TO {SCHEMA}, {schemas['pg_trgm']}, public")
+    conn.commit()
+    cur.close()
+    return schemas
+
+
+def preparar_layout(conn, nome: str, valores: list) -> Dict[str, float]:
+    """
+    Cria a tabela de um layout e carrega o catálogo nela.
+
+    :param conn: Conexão ativa com o banco
+    :param nome: Nome do layout (chave de ``LAYOUTS``)
+    :param valores: Tuplas ``(codigo_barras, descricao, marca)``
+    :return: Tempo de carga (INSERT + manutenção do índice) em segundos e
+        tamanhos da tabela e dos índices em bytes
+    """
+    tabela = f"{SCHEMA}.produtos_{nome}"
+    cur = conn.cursor()
+    cur.execute(LAYOUTS[nome]["ddl"].format(tabela=tabela, schema=SCHEMA))
+    conn.commit()
+
+    inicio = time.perf_counter()
+    execute_values(
+        cur,
+        f"INSERT INTO {tabela} (codigo_barras, descricao, marca) VALUES %s ON CONFLICT DO NOTHING",
+        valores,
+        page_size=1000,
+    )
+    conn.commit()
+    duracao = time.perf_counter() - inicio
+
+    cur.execute(f"ANALYZE {tabela}")
+    cur.execute("SELECT pg_table_size(%s), pg_indexes_size(%s)", (tabela, tabela))
+    tamanho_tabela, tamanho_indices = cur.fetchone()
+    conn.commit()
+    cur.close()
+    return {"carga": duracao, "tabela": tamanho_tabela, "indices": tamanho_indices}
+
+
+def medir_layout(conn, nome: str, repeticoes: int, gabarito: Dict[str, Set[str]]) -> Dict[str, object]:
+    """
+    Executa as consultas representativas de um layout e coleta latências e recall.
+
+    :param conn: Conexão ativa com o banco
+    :param nome: Nome do layout
+    :param repeticoes: Execuções por consulta
+    :param gabarito: Consulta → produtos relevantes
+    :return: Percentis agregados, linhas e recall por consulta e recall médio
+    """
+    sql = LAYOUTS[nome]["consulta"].format(tabela=f"{SCHEMA}.produtos_{nome}", schema=SCHEMA)
+    cur = conn.cursor()
+    amostras: List[float] = []
+    linhas_por_consulta = {}
+    recall_por_consulta = {}
+
+    for consulta in CONSULTAS:
+        parametros = {"q": consulta, "limite": LIMITE_RESULTADOS}
+        # Aquecimento: a primeira execução carrega páginas no cache
+        cur.execute(sql, parametros)
+        devolvidos = [linha[0] for linha in cur.fetchall()]
+        linhas_por_consulta[consulta] = len(devolvidos)
+        recall_por_consulta[consulta] = recall(devolvidos, gabarito[consulta], LIMITE_RESULTADOS)
+
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            cur.execute(sql, parametros)
+            cur.fetchall()
+            amostras.append(time.perf_counter() - inicio)
+
+    cur.close()
+    com_gabarito = [r for r in recall_por_consulta.values() if r is not None]
+    return {
+        "latencias": percentis(amostras),
+        "linhas": linhas_por_consulta,
+        "recall": recall_por_consulta,
+        "recall_medio": sum(com_gabarito) / len(com_gabarito) if com_gabarito else 0.0,
+    }
+
+
+def gravar_relatorio(caminho: str, dataset: str, total_produtos: int, repeticoes: int,
+                     resultados: dict, gabarito: Dict[str, Set[str]]):
+    """
+    Grava o relatório em Markdown com a tabela comparativa.
+
+    :param caminho: Arquivo de saída
+    :param dataset: Arquivo do catálogo usado
+    :param total_produtos: Quantidade de produtos carregados
+    :param repeticoes: Execuções por consulta
+    :param resultados: Resultado de cada layout (carga + latências + linhas + recall)
+    :param gabarito: Consulta → produtos relevantes
+    """
+    linhas = [
+        "# Benchmark de Busca Textual - produtos",
+        "",
+        f"> Gerado por `scripts/benchmark_busca.py` em {time.strftime('%Y-%m-%d %H:%M')}.",
+        f"> `{os.path.basename(dataset)}`: {total_produtos} produtos, "
+        f"{len(CONSULTAS)} consultas x {repeticoes} repetições.",
+    ]
+    if os.path.basename(dataset) != DATASET_FILE:
+        linhas.append(
+            f"> ⚠️ Catálogo diferente do `{DATASET_FILE}` de produção: regenere com "
+            f"`--dataset {DATASET_FILE}` antes de decidir com estes números."
+        )
+    linhas += [
+        "",
+        f"| Layout | Carga | Tabela | Índices | p50 | p95 | p99 | Recall@{LIMITE_RESULTADOS} |",
+        "| ------ | ----- | ------ | ------- | --- | --- | --- | ------ |",
+    ]
+    for nome, r in resultados.items():
+        lat = r["latencias"]
+        linhas.append(
+            f"| {nome} | {r['carga']:.1f}s | {formatar_bytes(r['tabela'])} | {formatar_bytes(r['indices'])} "
+            f"| {formatar_ms(lat['p50'])} | {formatar_ms(lat['p95'])} | {formatar_ms(lat['p99'])} "
+            f"| {r['recall_medio']:.0%} |"
+        )
+
+    linhas += [
+        "",
+        f"## Linhas retornadas (recall@{LIMITE_RESULTADOS}) por consulta",
+        "",
+        "Relevantes: produtos do catálogo com todas as palavras da intenção, sem acentos. "
+        "Consultas sem nenhum relevante (—) ficam fora da média.",
+        "",
+    ]
+    linhas.append("| Consulta | Intenção | Relevantes | " + " | ".join(resultados) + " |")
+    linhas.append("| -------- | -------- | ---------- | " + " | ".join("---" for _ in resultados) + " |")
+    for consulta, intencao in CONSULTAS.items():
+        celulas = []
+        for r in resultados.values():
+            valor = r["recall"][consulta]
+            celulas.append(f"{r['linhas'][consulta]} ({'—' if valor is None else f'{valor:.0%}'})")
+        linhas.append(f"| `{consulta}` | {intencao} | {len(gabarito[consulta])} | " + " | ".join(celulas) + " |")
+
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("\n".join(linhas) + "\n")
+
+
+def main():
+    """Função principal do benchmark de busca."""
+    parser = argparse.ArgumentParser(description="Benchmark dos layouts de busca textual")
+    parser.add_argument("--dataset", default=DATASET_FILE, help="JSON higienizado")
+    parser.add_argument("--relatorio", default=RELATORIO_FILE, help="Markdown de saída")
+    parser.add_argument("--repeticoes", type=int, default=100, help="Execuções por consulta")
+    parser.add_argument("--manter", action="store_true", help="Não remove o schema ao final")
+    argumentos = parser.parse_args()
+
+    load_dotenv(".env")
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("❌ DATABASE_URL não definida. Configure no .env ou nas variáveis de ambiente.")
+        sys.exit(1)
+
+    if not os.path.exists(argumentos.dataset):
+        print(f"❌ Arquivo {argumentos.dataset} não encontrado. Rode o clean_dataset.py antes.")
+        sys.exit(1)
+
+    with open(argumentos.dataset, "r", encoding="utf-8") as f:
+        valores = [
+            (str(p["codigo_barras"]), p["descricao"], (p.get("marca") or "Genérica")[:50])
+            for p in json.load(f)
+        ]
+
+    print("🎯 Calculando o gabarito das consultas...")
+    gabarito = {consulta: produtos_relevantes(valores, intencao) for consulta, intencao in CONSULTAS.items()}
+
+    conn = psycopg2.connect(dsn=database_url)
+    resultados = {}
+    try:
+        preparar_schema(conn)
+        for nome in LAYOUTS:
+            print(f"📦 Carregando layout '{nome}'...")
+            carga = preparar_layout(conn, nome, valores)
+            print(f"   ⏱️ Carga: {carga['carga']:.1f}s, índices: {formatar_bytes(carga['indices'])}. "
+                  f"Medindo consultas...")
+            resultados[nome] = {**carga, **medir_layout(conn, nome, argumentos.repeticoes, gabarito)}
+            lat = resultados[nome]["latencias"]
+            print(f"   📊 p50={formatar_ms(lat['p50'])} p95={formatar_ms(lat['p95'])} "
+                  f"p99={formatar_ms(lat['p99'])} recall={resultados[nome]['recall_medio']:.0%}")
+    finally:
+        if not argumentos.manter:
+            conn.rollback()
+            cur = conn.cursor()
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            conn.commit()
+            cur.close()
+        conn.close()
+
+    gravar_relatorio(argumentos.relatorio, argumentos.dataset, len(valores), argumentos.repeticoes,
+                     resultados, gabarito)
+    print(f"✅ Relatório salvo em {argumentos.relatorio}")
+
+
+if __name__ == "__main__":
+    main()
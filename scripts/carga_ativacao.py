@@ -0,0 +1,458 @@
+"""
+Teste de carga do caminho de ativação de tokens e do rate limiting.
+
+Reproduz, a partir de várias conexões simultâneas, a mesma sequência de SQL
+que ``api/tokens/ativar.ts`` + ``api/_lib/rate_limiter.ts`` executam por
+requisição (autocommit, uma query por vez, como o ``pg.Pool`` faz):
+
+1. Dois ``COUNT(*)`` de rate limit em ``tentativas_ativacao``.
+2. ``SELECT`` do token por ``token_hash``.
+3. ``UPDATE`` de expiração lazy (se aplicável).
+4. ``SELECT`` dos dispositivos vinculados.
+5. ``INSERT`` do dispositivo / ``UPDATE`` do token na primeira ativação.
+6. ``INSERT`` em ``tentativas_ativacao`` com o resultado.
+
+Antes, o banco é populado com volumes realistas de ``tokens``,
+``dispositivos`` e histórico de ``tentativas_ativacao`` usando
+``gerar_codigo_token``/``calcular_hash`` do ``gerar_token.py``.
+
+**Cenários:**
+
+- ``normal``: usuários legítimos, IPs distintos, tokens existentes.
+- ``forca_bruta``: poucos IPs chutando tokens inexistentes (deve cair no 429).
+- ``distribuido``: botnet — cada requisição de um IP novo, tokens inexistentes
+  (o rate limit por IP não segura; mede o custo dos INSERTs de auditoria).
+- ``misto``: 90% normal + 10% força bruta.
+
+O relatório traz vazão, percentis de latência, distribuição de respostas e
+esperas por lock (amostradas em ``pg_stat_activity`` durante a execução).
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Dentro do container, contra o Postgres de desenvolvimento
+    python scripts/carga_ativacao.py --popular --concorrencia 32 --requisicoes 5000
+
+.. note::
+   ``--popular`` e ``--limpar`` apagam ``tokens``, ``dispositivos`` e
+   ``tentativas_ativacao``. Só são aceitos com ``PG_ENV=development``.
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+from gerar_token import gerar_codigo_token, calcular_hash, DURACAO_POR_PLANO
+from medicao import percentis, formatar_ms
+
+try:
+    import psycopg2
+    from psycopg2.extras import execute_values
+    from psycopg2.pool import ThreadedConnectionPool
+except ImportError:
+    print("❌ psycopg2 não encontrado. Instale com: pip install psycopg2-binary")
+    sys.exit(1)
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+# Mesmos limites de api/_lib/rate_limiter.ts
+MAXIMO_TENTATIVAS_POR_HORA = 5
+MAXIMO_TENTATIVAS_INEXISTENTES = 10
+MAXIMO_DISPOSITIVOS = 2
+COOLDOWN_DISPOSITIVO_HORAS = 24
+
+# Volumes padrão da população inicial
+TOKENS_PADRAO = 20_000
+TENTATIVAS_HISTORICO_PADRAO = 200_000
+
+CENARIOS = ["normal", "forca_bruta", "distribuido", "misto"]
+IPS_ATACANTES = 8
+
+INTERVALO_AMOSTRAGEM_LOCKS = 0.1
+
+
+def hashear(valor: str) -> str:
+    """SHA-256 em hexadecimal (mesmo ``hashear`` de api/_lib/rate_limiter.ts)."""
+    return hashlib.sha256(valor.encode()).hexdigest()
+
+
+def popular(conn, total_tokens: int, total_tentativas: int) -> dict:
+    """
+    Limpa e popula as tabelas de tokens com volumes realistas.
+
+    Distribuição dos tokens: 40% válidos (nunca ativados), 45% ativos com 1-2
+    dispositivos e 15% expirados. O histórico de tentativas cobre os últimos
+    7 dias, com a maior parte fora da janela de 1h do rate limit.
+
+    :param conn: Conexão ativa com o banco
+    :param total_tokens: Quantidade de tokens a criar
+    :param total_tentativas: Quantidade de tentativas históricas
+    :return: Tokens em texto puro por status (usados pelos cenários)
+    """
+    gerador = random.Random(42)
+    agora = datetime.now(timezone.utc)
+    tokens_por_status = {"valido": [], "ativo": [], "expirado": []}
+    linhas_tokens = []
+    linhas_dispositivos = []
+
+    vistos = set()
+    while len(linhas_tokens) < total_tokens:
+        # 30^7 combinações: com 20k tokens a chance de repetir um código é
+        # ~1%, e o UNIQUE(token_hash) abortaria a população inteira
+        token = gerar_codigo_token()
+        if token in vistos:
+            continue
+        vistos.add(token)
+        token_hash = calcular_hash(token)
+        plano = gerador.choice(list(DURACAO_POR_PLANO))
+        duracao = DURACAO_POR_PLANO[plano]
+        sorteio = gerador.random()
+
+        if sorteio < 0.40:
+            status, ativado_em, expira_em = "valido", None, None
+        elif sorteio < 0.85:
+            status = "ativo"
+            ativado_em = agora - timedelta(days=gerador.uniform(0, duracao - 1))
+            expira_em = ativado_em + timedelta(days=duracao)
+            # Um terço dos tokens ativos já tem o segundo dispositivo (vinculado 25h depois)
+            for indice in range(gerador.choice([1, 1, 2])):
+                linhas_dispositivos.append((
+                    token_hash,
+                    hashear(f"{token}:dispositivo:{indice}"),
+                    min(ativado_em + timedelta(hours=25 * indice), agora),
+                ))
+        else:
+            status = "expirado"
+            ativado_em = agora - timedelta(days=duracao + gerador.uniform(1, 30))
+            expira_em = ativado_em + timedelta(days=duracao)
+
+        tokens_por_status[status].append(token)
+        linhas_tokens.append((token_hash, plano, status, duracao, ativado_em, expira_em))
+
+    resultados_historicos = ["sucesso"] * 6 + ["token_inexistente"] * 3 + ["token_expirado"]
+    linhas_tentativas = [
+        (
+            hashear(f"ip-historico-{gerador.randrange(total_tentativas // 4 or 1)}"),
+            hashear(f"ua-{gerador.randrange(50)}"),
+            hashear(f"fp-{gerador.randrange(total_tokens or 1)}"),
+            calcular_hash(gerar_codigo_token()),
+            gerador.choice(resultados_historicos),
+            agora - timedelta(seconds=gerador.uniform(0, 7 * 24 * 3600)),
+        )
+        for _ in range(total_tentativas)
+    ]
+
+    cur = conn.cursor()
+    cur.execute("TRUNCATE tentativas_ativacao, dispositivos, tokens")
+    execute_values(
+        cur,
+        "INSERT INTO tokens (token_hash, plano, status, duracao_dias, ativado_em, expira_em) VALUES %s",
+        linhas_tokens, page_size=1000,
+    )
+    execute_values(
+        cur,
+        "INSERT INTO dispositivos (token_hash, fingerprint_hash, vinculado_em) VALUES %s "
+        "ON CONFLICT DO NOTHING",
+        linhas_dispositivos, page_size=1000,
+    )
+    execute_values(
+        cur,
+        "INSERT INTO tentativas_ativacao "
+        "(ip_hash, user_agent_hash, fingerprint_hash, token_hash_tentado, resultado, criado_em) VALUES %s",
+        linhas_tentativas, page_size=1000,
+    )
+    cur.execute("ANALYZE tokens; ANALYZE dispositivos; ANALYZE tentativas_ativacao")
+    conn.commit()
+    cur.close()
+
+    print(f"   🌱 {len(linhas_tokens):,} tokens, {len(linhas_dispositivos):,} dispositivos, "
+          f"{len(linhas_tentativas):,} tentativas históricas")
+    return tokens_por_status
+
+
+def registrar_tentativa(cur, ip_hash, user_agent_hash, fingerprint_hash, token_hash, resultado):
+    cur.execute(
+        """INSERT INTO tentativas_ativacao
+           (ip_hash, user_agent_hash, fingerprint_hash, token_hash_tentado, resultado)
+           VALUES (%s, %s, %s, %s, %s)""",
+        (ip_hash, user_agent_hash, fingerprint_hash, token_hash, resultado),
+    )
+
+
+def ativar(cur, ip: str, user_agent: str, token: str, fingerprint: str) -> int:
+    """
+    Executa a sequência de SQL de ``POST /api/tokens/ativar``.
+
+    :param cur: Cursor de uma conexão em autocommit
+    :return: Status HTTP que o endpoint devolveria
+    """
+    ip_hash = hashear(ip)
+    user_agent_hash = hashear(user_agent)
+
+    # 1. Rate limiting (rate_limiter.verificarRateLimit)
+    cur.execute(
+        """SELECT COUNT(*) FROM tentativas_ativacao
+           WHERE ip_hash = %s AND criado_em > NOW() - INTERVAL '1 hour'""",
+        (ip_hash,),
+    )
+    if cur.fetchone()[0] >= MAXIMO_TENTATIVAS_POR_HORA:
+        return 429
+
+    cur.execute(
+        """SELECT COUNT(*) FROM tentativas_ativacao
+           WHERE ip_hash = %s AND resultado = 'token_inexistente'
+             AND criado_em > NOW() - INTERVAL '1 hour'""",
+        (ip_hash,),
+    )
+    if cur.fetchone()[0] >= MAXIMO_TENTATIVAS_INEXISTENTES:
+        return 429
+
+    token_hash = calcular_hash(token)
+    fingerprint_hash = hashear(fingerprint)
+
+    # 2. Busca token
+    cur.execute(
+        "SELECT id, plano, status, duracao_dias, ativado_em, expira_em FROM tokens WHERE token_hash = %s",
+        (token_hash,),
+    )
+    linha = cur.fetchone()
+    if linha is None:
+        registrar_tentativa(cur, ip_hash, user_agent_hash, fingerprint_hash, token_hash, "token_inexistente")
+        return 404
+
+    _, _, status, duracao_dias, _, expira_em = linha
+    agora = datetime.now(timezone.utc)
+
+    # 3. Expiração lazy
+    if status == "ativo" and expira_em and expira_em < agora:
+        cur.execute("UPDATE tokens SET status = %s WHERE token_hash = %s", ("expirado", token_hash))
+        status = "expirado"
+
+    if status == "expirado":
+        registrar_tentativa(cur, ip_hash, user_agent_hash, fingerprint_hash, token_hash, "token_expirado")
+        return 410
+
+    # 4. Limite de dispositivos
+    cur.execute(
+        "SELECT fingerprint_hash, vinculado_em FROM dispositivos WHERE token_hash = %s",
+        (token_hash,),
+    )
+    dispositivos = cur.fetchall()
+    if not any(d[0] == fingerprint_hash for d in dispositivos):
+        if len(dispositivos) >= MAXIMO_DISPOSITIVOS:
+            registrar_tentativa(cur, ip_hash, user_agent_hash, fingerprint_hash, token_hash,
+                                "bloqueado_limite_dispositivos")
+            return 403
+
+        if dispositivos and agora - dispositivos[-1][1] < timedelta(hours=COOLDOWN_DISPOSITIVO_HORAS):
+            registrar_tentativa(cur, ip_hash, user_agent_hash, fingerprint_hash, token_hash,
+                                "bloqueado_cooldown_24h")
+            return 429
+
+        cur.execute(
+            "INSERT INTO dispositivos (token_hash, fingerprint_hash) VALUES (%s, %s)",
+            (token_hash, fingerprint_hash),
+        )
+
+    # 5. Primeira ativação
+    if status == "valido":
+        cur.execute(
+            "UPDATE tokens SET status = %s, ativado_em = %s, expira_em = %s WHERE token_hash = %s",
+            ("ativo", agora, agora + timedelta(days=duracao_dias), token_hash),
+        )
+
+    registrar_tentativa(cur, ip_hash, user_agent_hash, fingerprint_hash, token_hash, "sucesso")
+    return 200
+
+
+def gerar_requisicoes(cenario: str, quantidade: int, tokens_por_status: dict, gerador: random.Random) -> list:
+    """
+    Monta a lista de requisições ``(ip, user_agent, token, fingerprint)`` de um cenário.
+
+    :param cenario: Nome do cenário (ver ``CENARIOS``)
+    :param quantidade: Total de requisições
+    :param tokens_por_status: Tokens em texto puro gerados por :func:`popular`
+    :param gerador: Gerador aleatório (reprodutível)
+    :return: Lista de requisições
+    """
+    existentes = tokens_por_status["valido"] + tokens_por_status["ativo"] + tokens_por_status["expirado"]
+
+    def normal(i):
+        token = gerador.choice(existentes)
+        # Reusa o fingerprint do primeiro dispositivo na maioria das vezes
+        fingerprint = f"{token}:dispositivo:{0 if gerador.random() < 0.8 else gerador.randrange(3)}"
+        return (f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}", "Mozilla/5.0", token, fingerprint)
+
+    def forca_bruta(i):
+        return (f"203.0.113.{i % IPS_ATACANTES}", "python-requests/2.31", gerar_codigo_token(), f"bot-{i}")
+
+    def distribuido(i):
+        return (f"198.18.{i // 256 % 256}.{i % 256}", "curl/8.0", gerar_codigo_token(), f"bot-{i}")
+
+    if cenario == "normal":
+        return [normal(i) for i in range(quantidade)]
+    if cenario == "forca_bruta":
+        return [forca_bruta(i) for i in range(quantidade)]
+    if cenario == "distribuido":
+        return [distribuido(i) for i in range(quantidade)]
+    return [forca_bruta(i) if gerador.random() < 0.1 else normal(i) for i in range(quantidade)]
+
+
+class MonitorLocks(threading.Thread):
+    """
+    Amostra periodicamente as sessões esperando por lock no banco.
+
+    Roda em conexão própria para não competir com o pool da carga.
+    """
+
+    def __init__(self, database_url: str):
+        super().__init__(daemon=True)
+        self.conn = psycopg2.connect(dsn=database_url)
+        self.conn.autocommit = True
+        self.amostras = []
+        self.parar = threading.Event()
+
+    def run(self):
+        cur = self.conn.cursor()
+        while not self.parar.is_set():
+            cur.execute(
+                "SELECT COUNT(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+            )
+            self.amostras.append(cur.fetchone()[0])
+            self.parar.wait(INTERVALO_AMOSTRAGEM_LOCKS)
+        cur.close()
+
+    def deadlocks(self) -> int:
+        cur = self.conn.cursor()
+        cur.execute("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+        total = cur.fetchone()[0]
+        cur.close()
+        return total
+
+
+def executar_cenario(database_url: str, requisicoes: list, concorrencia: int) -> dict:
+    """
+    Dispara as requisições de um cenário com ``concorrencia`` conexões.
+
+    :param database_url: Connection string do PostgreSQL
+    :param requisicoes: Requisições geradas por :func:`gerar_requisicoes`
+    :param concorrencia: Número de workers (e conexões no pool)
+    :return: Métricas do cenário
+    """
+    pool = ThreadedConnectionPool(concorrencia, concorrencia, dsn=database_url)
+    monitor = MonitorLocks(database_url)
+    deadlocks_antes = monitor.deadlocks()
+    latencias = []
+    respostas = Counter()
+    trava = threading.Lock()
+
+    def trabalhar(requisicao):
+        conn = pool.getconn()
+        conn.autocommit = True
+        try:
+            inicio = time.perf_counter()
+            try:
+                with conn.cursor() as cur:
+                    status = ativar(cur, *requisicao)
+            except psycopg2.Error:
+                status = 500
+            duracao = time.perf_counter() - inicio
+        finally:
+            pool.putconn(conn)
+        with trava:
+            latencias.append(duracao)
+            respostas[status] += 1
+
+    monitor.start()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(trabalhar, requisicoes))
+    duracao_total = time.perf_counter() - inicio
+    monitor.parar.set()
+    monitor.join()
+
+    deadlocks = monitor.deadlocks() - deadlocks_antes
+    monitor.conn.close()
+    pool.closeall()
+
+    return {
+        "vazao": len(requisicoes) / duracao_total,
+        "latencias": percentis(latencias),
+        "respostas": dict(sorted(respostas.items())),
+        "locks_max": max(monitor.amostras, default=0),
+        "locks_media": sum(monitor.amostras) / len(monitor.amostras) if monitor.amostras else 0,
+        "deadlocks": deadlocks,
+    }
+
+
+def main():
+    """Função principal do teste de carga."""
+    parser = argparse.ArgumentParser(description="Teste de carga da ativação de tokens")
+    parser.add_argument("--cenarios", nargs="+", choices=CENARIOS, default=CENARIOS)
+    parser.add_argument("--concorrencia", type=int, default=16, help="Conexões simultâneas")
+    parser.add_argument("--requisicoes", type=int, default=2000, help="Requisições por cenário")
+    parser.add_argument("--popular", action="store_true", help="Limpa e popula as tabelas antes")
+    parser.add_argument("--tokens", type=int, default=TOKENS_PADRAO)
+    parser.add_argument("--tentativas", type=int, default=TENTATIVAS_HISTORICO_PADRAO)
+    parser.add_argument("--limpar", action="store_true", help="Limpa as tabelas ao final")
+    argumentos = parser.parse_args()
+
+    load_dotenv(".env")
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("❌ DATABASE_URL não definida. Configure no .env ou nas variáveis de ambiente.")
+        sys.exit(1)
+
+    if (argumentos.popular or argumentos.limpar) and os.getenv("PG_ENV") != "development":
+        print("❌ --popular/--limpar apagam dados e só rodam com PG_ENV=development.")
+        sys.exit(1)
+
+    conn = psycopg2.connect(dsn=database_url)
+    if argumentos.popular:
+        print("🌱 Populando tabelas de tokens...")
+        tokens_por_status = popular(conn, argumentos.tokens, argumentos.tentativas)
+    else:
+        # Sem população não temos os tokens em texto puro: só cenários de ataque fazem sentido
+        tokens_por_status = {"valido": [], "ativo": [], "expirado": []}
+        sem_tokens = [c for c in argumentos.cenarios if c in ("normal", "misto")]
+        if sem_tokens:
+            print(f"❌ Cenário(s) {', '.join(sem_tokens)} precisam de --popular (tokens em texto puro).")
+            sys.exit(1)
+
+    gerador = random.Random(7)
+    for cenario in argumentos.cenarios:
+        requisicoes = gerar_requisicoes(cenario, argumentos.requisicoes, tokens_por_status, gerador)
+        print(f"\n🔥 Cenário '{cenario}': {len(requisicoes):,} requisições, "
+              f"{argumentos.concorrencia} conexões...")
+        r = executar_cenario(database_url, requisicoes, argumentos.concorrencia)
+        lat = r["latencias"]
+        print(f"   🚀 Vazão:      {r['vazao']:,.0f} req/s")
+        print(f"   ⏱️ Latência:   p50={formatar_ms(lat['p50'])} p95={formatar_ms(lat['p95'])} "
+              f"p99={formatar_ms(lat['p99'])}")
+        print(f"   📊 Respostas:  {r['respostas']}")
+        print(f"   🔒 Esperando lock: máx {r['locks_max']}, média {r['locks_media']:.2f} | "
+              f"Deadlocks: {r['deadlocks']}")
+
+    if argumentos.limpar:
+        cur = conn.cursor()
+        cur.execute("TRUNCATE tentativas_ativacao, dispositivos, tokens")
+        conn.commit()
+        cur.close()
+        print("\n🧹 Tabelas de tokens limpas.")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
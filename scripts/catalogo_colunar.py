@@ -0,0 +1,306 @@
+"""
+Snapshot colunar (Parquet) do catálogo higienizado.
+
+Recarregar o ``produtos_higienizados.json`` para análises (contagem de marcas,
+distribuição de tamanhos, taxa de produtos sem imagem) significa parsear um
+array JSON grande e indentado em milhares de dicts. O snapshot colunar guarda
+os mesmos dados:
+
+- **Tipados**: ``preco_estimado`` como ``float64``, ``imagem`` anulável.
+- **Comprimidos** com zstd.
+- **Dictionary-encoded** em ``marca`` e ``tamanho`` (poucos valores distintos
+  repetidos em centenas de milhares de linhas).
+
+A leitura é coluna a coluna (só as colunas pedidas saem do disco) e usa
+memory mapping quando possível.
+
+.. note::
+
+    O ganho é das análises, não da carga no banco. Em um catálogo sintético
+    de 150k produtos (``benchmark``): 35.3 MB → 3.2 MB em disco, 18x na carga
+    com pandas e ~100x lendo só ``marca``, mas a importação do
+    ``init_db.import_data`` fica igual (~18.5s nos dois formatos). O Parquet
+    só corta a montagem das tuplas (0.72s → 0.35s); o ``execute_values`` do
+    psycopg2 ainda precisa de um objeto Python por valor, e o INSERT com a
+    manutenção dos índices de busca domina o tempo.
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Gera o snapshot a partir do JSON existente
+    python scripts/catalogo_colunar.py converter
+
+    # Compara tempo de carga e tamanho em disco JSON x Parquet
+    # (com DATABASE_URL definida, mede também a importação do init_db)
+    python scripts/catalogo_colunar.py benchmark
+
+.. code-block:: python
+
+    import pandas as pd
+    marcas = pd.read_parquet("produtos_higienizados.parquet", columns=["marca"])
+    marcas["marca"].value_counts().head()
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Iterator, List, Optional
+
+from medicao import formatar_bytes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    print("❌ pyarrow não encontrado. Instale com: pip install pyarrow")
+    sys.exit(1)
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+DATASET_FILE = "produtos_higienizados.json"
+COLUNAR_FILE = "produtos_higienizados.parquet"
+
+COMPRESSAO = "zstd"
+LINHAS_POR_GRUPO = 50_000
+LINHAS_POR_LOTE = 10_000
+
+# Schema descartável onde o benchmark mede a importação do init_db
+SCHEMA_BENCHMARK = "bench_colunar"
+
+ESQUEMA = pa.schema([
+    ("codigo_barras", pa.string()),
+    ("descricao", pa.string()),
+    ("marca", pa.dictionary(pa.int32(), pa.string())),
+    ("tamanho", pa.dictionary(pa.int32(), pa.string())),
+    ("imagem", pa.string()),
+    ("preco_estimado", pa.float64()),
+])
+
+
+def salvar(produtos: List[dict], caminho: str = COLUNAR_FILE):
+    """
+    Grava os produtos higienizados como Parquet tipado e comprimido.
+
+    :param produtos: Lista de produtos (mesmo formato do JSON higienizado)
+    :param caminho: Arquivo ``.parquet`` de saída
+    """
+    colunas = {
+        campo.name: [p.get(campo.name) for p in produtos]
+        for campo in ESQUEMA
+    }
+    colunas["codigo_barras"] = [str(c) for c in colunas["codigo_barras"]]
+    colunas["preco_estimado"] = [float(v or 0) for v in colunas["preco_estimado"]]
+
+    tabela = pa.table(
+        {
+            nome: pa.array(valores, type=pa.string()).dictionary_encode()
+            if pa.types.is_dictionary(ESQUEMA.field(nome).type)
+            else pa.array(valores, type=ESQUEMA.field(nome).type)
+            for nome, valores in colunas.items()
+        },
+        schema=ESQUEMA,
+    )
+
+    temporario = f"{caminho}.tmp"
+    pq.write_table(
+        tabela,
+        temporario,
+        compression=COMPRESSAO,
+        row_group_size=LINHAS_POR_GRUPO,
+        use_dictionary=["marca", "tamanho"],
+    )
+    os.replace(temporario, caminho)
+
+
+def carregar(caminho: str = COLUNAR_FILE, colunas: Optional[List[str]] = None) -> "pa.Table":
+    """
+    Lê o snapshot (ou só algumas colunas) com memory mapping.
+
+    :param caminho: Arquivo ``.parquet``
+    :param colunas: Colunas desejadas (None = todas)
+    :return: Tabela Arrow (use ``.to_pandas()`` para DataFrame)
+    """
+    return pq.read_table(caminho, columns=colunas, memory_map=True)
+
+
+def iterar_lotes(
+    caminho: str = COLUNAR_FILE,
+    colunas: Optional[List[str]] = None,
+    tamanho_lote: int = LINHAS_POR_LOTE,
+) -> Iterator["pa.RecordBatch"]:
+    """
+    Percorre o snapshot em lotes colunares, sem montar a tabela inteira.
+
+    Usado pelo ``init_db.import_data``, que monta as tuplas do INSERT a
+    partir das colunas de cada lote (ainda um objeto Python por valor).
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        for lote in iterar_lotes(colunas=["codigo_barras", "marca"]):
+            marcas = lote.column("marca").to_pylist()
+
+    :param caminho: Arquivo ``.parquet``
+    :param colunas: Colunas desejadas (None = todas)
+    :param tamanho_lote: Máximo de linhas por lote
+    :return: Iterador de ``RecordBatch``
+    """
+    arquivo = pq.ParquetFile(caminho, memory_map=True)
+    return arquivo.iter_batches(batch_size=tamanho_lote, columns=colunas)
+
+
+def coluna_para_lista(coluna: "pa.Array") -> list:
+    """
+    Converte uma coluna de um lote em lista Python.
+
+    Colunas dictionary-encoded (``marca``, ``tamanho``) são decodificadas pelos
+    índices, convertendo cada valor distinto uma única vez: o ``to_pylist``
+    direto delas é ~30x mais lento.
+
+    :param coluna: Array Arrow (comum ou dictionary-encoded)
+    :return: Lista de valores Python
+    """
+    if not pa.types.is_dictionary(coluna.type):
+        return coluna.to_pylist()
+    valores = coluna.dictionary.to_pylist()
+    return [None if indice is None else valores[indice] for indice in coluna.indices.to_pylist()]
+
+
+def iterar_produtos(caminho: str = COLUNAR_FILE) -> Iterator[dict]:
+    """
+    Percorre o snapshot um lote por vez, devolvendo dicts.
+
+    :param caminho: Arquivo ``.parquet``
+    :return: Iterador de produtos no formato do JSON higienizado
+    """
+    for lote in iterar_lotes(caminho):
+        nomes = lote.schema.names
+        colunas = [coluna_para_lista(coluna) for coluna in lote.columns]
+        for valores in zip(*colunas):
+            yield dict(zip(nomes, valores))
+
+
+def _medir_importacao(conn, init_db, dataset_file: str) -> float:
+    """
+    Cronometra ``init_db.import_data`` em um schema descartável.
+
+    A tabela é uma cópia de ``public.produtos`` com os mesmos índices, para
+    que o custo de manutenção do índice de busca entre na conta.
+
+    :param conn: Conexão ativa com o banco
+    :param init_db: Módulo ``init_db`` (import tardio)
+    :param dataset_file: JSON ou snapshot ``.parquet``
+    :return: Segundos gastos na importação
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {SCHEMA_BENCHMARK}.produtos")
+    conn.commit()
+    inicio = time.perf_counter()
+    if not init_db.import_data(conn, dataset_file, clusters_file=""):
+        raise RuntimeError(f"importação de {dataset_file} falhou")
+    return time.perf_counter() - inicio
+
+
+def benchmark(json_file: str, colunar_file: str, database_url: Optional[str] = None):
+    """
+    Compara tamanho em disco e tempo de carga entre JSON e Parquet.
+
+    Mede a carga completa (dicts Python e DataFrame), a leitura de uma
+    única coluna (caso típico de análise: contagem de marcas) e o caminho do
+    ``init_db.import_data``: a montagem das tuplas do INSERT e, com
+    ``database_url``, a importação inteira em um schema descartável.
+
+    :param json_file: JSON higienizado
+    :param colunar_file: Snapshot Parquet
+    :param database_url: Banco para medir a importação completa (None = só as tuplas)
+    """
+    import pandas as pd
+    # Import tardio: init_db exige psycopg2 e python-dotenv
+    import init_db
+
+    def medir(funcao):
+        inicio = time.perf_counter()
+        funcao()
+        return time.perf_counter() - inicio
+
+    def json_dicts():
+        with open(json_file, "r", encoding="utf-8") as f:
+            json.load(f)
+
+    def tuplas(leitor, arquivo):
+        for _ in leitor(arquivo, {}):
+            pass
+
+    medicoes = [
+        ("Carga completa (dicts)", medir(json_dicts), medir(lambda: list(iterar_produtos(colunar_file)))),
+        ("Carga completa (pandas)", medir(lambda: pd.read_json(json_file)),
+         medir(lambda: pd.read_parquet(colunar_file))),
+        ("Só a coluna marca (pandas)", medir(lambda: pd.read_json(json_file)["marca"].value_counts()),
+         medir(lambda: pd.read_parquet(colunar_file, columns=["marca"])["marca"].value_counts())),
+        ("Tuplas do init_db", medir(lambda: tuplas(init_db.read_json_batches, json_file)),
+         medir(lambda: tuplas(init_db.read_parquet_batches, colunar_file))),
+    ]
+
+    if database_url:
+        conn = init_db.psycopg2.connect(dsn=database_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA_BENCHMARK} CASCADE")
+                cur.execute(f"CREATE SCHEMA {SCHEMA_BENCHMARK}")
+                cur.execute(f"CREATE TABLE {SCHEMA_BENCHMARK}.produtos (LIKE public.produtos INCLUDING ALL)")
+                cur.execute(f"SET search_path TO {SCHEMA_BENCHMARK}, public")
+            conn.commit()
+            medicoes.append((
+                "Importação init_db",
+                _medir_importacao(conn, init_db, json_file),
+                _medir_importacao(conn, init_db, colunar_file),
+            ))
+        finally:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA_BENCHMARK} CASCADE")
+            conn.commit()
+            conn.close()
+
+    tamanho_json = os.path.getsize(json_file)
+    tamanho_colunar = os.path.getsize(colunar_file)
+    print(f"   {'':28} {'JSON':>10} {'Parquet':>10} {'Ganho':>8}")
+    print(f"   {'Tamanho em disco':28} {formatar_bytes(tamanho_json):>10} "
+          f"{formatar_bytes(tamanho_colunar):>10} {tamanho_json / tamanho_colunar:>7.1f}x")
+    for nome, tempo_json, tempo_colunar in medicoes:
+        print(f"   {nome:28} {tempo_json:>9.2f}s {tempo_colunar:>9.2f}s {tempo_json / tempo_colunar:>7.1f}x")
+
+
+def main():
+    """Função principal: converter o JSON ou comparar os formatos."""
+    parser = argparse.ArgumentParser(description="Snapshot colunar do catálogo higienizado")
+    parser.add_argument("comando", choices=["converter", "benchmark"])
+    parser.add_argument("--dataset", default=DATASET_FILE, help="JSON higienizado")
+    parser.add_argument("--colunar", default=COLUNAR_FILE, help="Arquivo Parquet")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="Banco para medir a importação completa do init_db (padrão: DATABASE_URL)")
+    argumentos = parser.parse_args()
+
+    if not os.path.exists(argumentos.dataset):
+        print(f"❌ Arquivo {argumentos.dataset} não encontrado. Rode o clean_dataset.py antes.")
+        sys.exit(1)
+
+    if argumentos.comando == "converter" or not os.path.exists(argumentos.colunar):
+        print("🗜️ Gerando snapshot colunar...")
+        with open(argumentos.dataset, "r", encoding="utf-8") as f:
+            salvar(json.load(f), argumentos.colunar)
+        print(f"✅ Snapshot salvo em {argumentos.colunar} "
+              f"({formatar_bytes(os.path.getsize(argumentos.colunar))})")
+
+    if argumentos.comando == "benchmark":
+        print("⏱️ Benchmark JSON x Parquet...")
+        benchmark(argumentos.dataset, argumentos.colunar, argumentos.database_url)
+
+
+if __name__ == "__main__":
+    main()
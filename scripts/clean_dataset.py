@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import json
 import re
@@ -6,6 +7,7 @@ import sys
 # Configuração de Paths
 INPUT_FILE = "produtos_brasil_v1.csv"
 OUTPUT_FILE = "produtos_higienizados.json"
+COLUNAR_FILE = "produtos_higienizados.parquet"  # Opcional: python clean_dataset.py --colunar
 
 # Regex para captura de peso/volume
 REGEX_UNIDADES = re.compile(r"(?P<val>\d+(?:[.,]\d+)?)\s*(?P<unit>[a-zA-Z.]+)")
@@ -196,12 +198,12 @@ def process_chunk(chunk):
             
     return processed_data
 
-def main():
+def main(input_file=INPUT_FILE, output_file=OUTPUT_FILE, colunar_file=None):
     print("Iniciando higienização para JSON...")
     
     # Chunk size menor para garantir memoria com JSON array crescente
     chunk_size = 5000 
-    chunks = pd.read_csv(INPUT_FILE, chunksize=chunk_size)
+    chunks = pd.read_csv(input_file, chunksize=chunk_size)
     
     all_products = []
     
@@ -213,12 +215,30 @@ def main():
         total_lidos += len(chunk)
         print(f"Lidos: {total_lidos}, Mantidos: {len(all_products)}...")
         
-    print(f"Salvando {len(all_products)} produtos em {OUTPUT_FILE}...")
+    print(f"Salvando {len(all_products)} produtos em {output_file}...")
     
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+    with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(all_products, f, indent=2, ensure_ascii=False)
+
+    if colunar_file:
+        # Import tardio: pyarrow só é necessário quando o snapshot colunar é pedido
+        import catalogo_colunar
+        print(f"Salvando snapshot colunar em {colunar_file}...")
+        catalogo_colunar.salvar(all_products, colunar_file)
         
     print("Concluído!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Higienizar o CSV do Open Food Facts para JSON")
+    parser.add_argument("--entrada", default=INPUT_FILE, help="CSV filtrado para o Brasil")
+    parser.add_argument("--saida", default=OUTPUT_FILE, help="JSON higienizado")
+    parser.add_argument(
+        "--colunar",
+        nargs="?",
+        const=COLUNAR_FILE,
+        default=None,
+        help=f"Também grava o snapshot Parquet (padrão: {COLUNAR_FILE})",
+    )
+    argumentos = parser.parse_args()
+
+    main(argumentos.entrada, argumentos.saida, argumentos.colunar)
@@ -0,0 +1,243 @@
+"""
+Exporta o catálogo higienizado como shards estáticos e imutáveis por prefixo de GTIN.
+
+A maioria das consultas por código de barras é somente leitura. Em vez de
+passar por uma função serverless + pool do banco, o frontend pode baixar o
+shard que contém o GTIN direto da CDN, com cache longo.
+
+Estrutura gerada (servida como asset estático pelo Vite/Vercel):
+
+.. code-block:: text
+
+    public/catalogo/
+    ├── manifesto.json              # Único arquivo mutável (cache curto)
+    └── shards/
+        ├── 7891.3f2a9c1b.json      # Imutável: o hash do conteúdo faz parte do nome
+        └── 7892.a81d0e44.json
+
+Os prefixos são adaptativos: um prefixo com mais de ``--max-por-shard``
+produtos é dividido em 10 prefixos um dígito mais longos. Para achar o shard
+de um GTIN, o cliente procura no manifesto o **maior prefixo** que casa com o código.
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Dentro do container, depois do verificar_imagens.py
+    python scripts/exportar_shards.py --max-por-shard 2000
+
+.. note::
+   Re-exportações só gravam shards cujo conteúdo mudou (o nome com hash já
+   existe em disco). Shards que saíram do manifesto só são removidos uma
+   geração depois: clientes e CDN podem manter o manifesto anterior em cache
+   por até ``max-age=300`` (vercel.json) e continuar pedindo esses arquivos.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+# Dataset com as URLs de imagem já verificadas (verificar_imagens.py)
+DATASET_FILE = "produtos_verificados.json"
+OUTPUT_DIR = "public/catalogo"
+SHARDS_SUBDIR = "shards"
+MANIFESTO_FILE = "manifesto.json"
+
+MAX_POR_SHARD_PADRAO = 2000
+VERSAO_FORMATO = 1
+
+# Ordem dos campos em cada registro compacto (declarada no manifesto)
+CAMPOS = ("descricao", "marca", "tamanho", "imagem", "preco_estimado")
+
+# JSON compacto: sem espaços após separadores
+SEPARADORES_COMPACTOS = (",", ":")
+
+
+def particionar(codigos: list, prefixo: str, max_por_shard: int) -> dict:
+    """
+    Divide recursivamente os códigos em prefixos até caberem no limite.
+
+    Códigos com o mesmo tamanho do prefixo não podem ser divididos e ficam
+    no shard do próprio prefixo.
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        particionar(["7891", "7892", "7893"], "", 2)
+        # {'7891': ['7891'], '7892': ['7892'], '7893': ['7893']}
+
+    :param codigos: Códigos de barras (ordenados) que começam com ``prefixo``
+    :param prefixo: Prefixo atual
+    :param max_por_shard: Máximo de produtos por shard
+    :return: Dicionário prefixo → lista de códigos
+    """
+    if len(codigos) <= max_por_shard:
+        return {prefixo: codigos}
+
+    # Se todos os códigos compartilham o próximo dígito, não adianta criar
+    # shards vazios: desce direto para o maior prefixo comum
+    comum = os.path.commonprefix(codigos)
+    if len(comum) > len(prefixo):
+        prefixo_filho = comum if all(len(c) > len(comum) for c in codigos) else None
+        if prefixo_filho:
+            return particionar(codigos, prefixo_filho, max_por_shard)
+
+    shards = {}
+    restantes = [c for c in codigos if len(c) == len(prefixo)]
+    filhos = {}
+    for codigo in codigos:
+        if len(codigo) > len(prefixo):
+            filhos.setdefault(codigo[:len(prefixo) + 1], []).append(codigo)
+
+    if restantes:
+        shards[prefixo] = restantes
+    for prefixo_filho, codigos_filho in filhos.items():
+        shards.update(particionar(codigos_filho, prefixo_filho, max_por_shard))
+    return shards
+
+
+def serializar_shard(produtos_por_codigo: dict, codigos: list) -> bytes:
+    """
+    Serializa um shard em JSON compacto: ``{codigo: [campos...]}``.
+
+    A ordem é determinística (códigos ordenados) para que o mesmo conteúdo
+    gere sempre o mesmo hash.
+
+    :param produtos_por_codigo: Catálogo indexado por código de barras
+    :param codigos: Códigos que pertencem ao shard
+    :return: Bytes UTF-8 do shard
+    """
+    registros = {
+        codigo: [produtos_por_codigo[codigo].get(campo) for campo in CAMPOS]
+        for codigo in sorted(codigos)
+    }
+    return json.dumps(
+        registros, ensure_ascii=False, separators=SEPARADORES_COMPACTOS
+    ).encode("utf-8")
+
+
+def shards_anteriores(caminho_manifesto: str, ativos: set) -> set:
+    """
+    Lista os shards da geração anterior que devem ser mantidos em disco.
+
+    Se o conjunto de shards não mudou (re-exportação sem alterações), a
+    geração anterior continua sendo a registrada no manifesto atual.
+
+    :param caminho_manifesto: Manifesto atualmente publicado
+    :param ativos: Nomes dos shards da nova geração
+    :return: Nomes dos shards antigos ainda referenciáveis
+    """
+    if not os.path.exists(caminho_manifesto):
+        return set()
+    with open(caminho_manifesto, "r", encoding="utf-8") as f:
+        manifesto = json.load(f)
+
+    publicados = {os.path.basename(s["arquivo"]) for s in manifesto.get("shards", {}).values()}
+    if publicados == ativos:
+        return set(manifesto.get("shards_anteriores", []))
+    return publicados - ativos
+
+
+def exportar(produtos: list, diretorio: str, max_por_shard: int) -> dict:
+    """
+    Grava os shards alterados e o manifesto em ``diretorio``.
+
+    :param produtos: Lista de produtos higienizados
+    :param diretorio: Diretório de saída
+    :param max_por_shard: Máximo de produtos por shard
+    :return: Estatísticas (``shards``, ``gravados``, ``removidos``)
+    """
+    pasta_shards = os.path.join(diretorio, SHARDS_SUBDIR)
+    os.makedirs(pasta_shards, exist_ok=True)
+
+    # Primeiro registro vence em caso de GTIN repetido (mesma regra do
+    # ON CONFLICT DO NOTHING do init_db.py)
+    produtos_por_codigo = {}
+    for produto in produtos:
+        produtos_por_codigo.setdefault(str(produto["codigo_barras"]), produto)
+    particoes = particionar(sorted(produtos_por_codigo), "", max_por_shard)
+
+    manifesto_shards = {}
+    gravados = 0
+    for prefixo, codigos in sorted(particoes.items()):
+        conteudo = serializar_shard(produtos_por_codigo, codigos)
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        nome = f"{prefixo or 'raiz'}.{sha256[:8]}.json"
+        caminho = os.path.join(pasta_shards, nome)
+
+        if not os.path.exists(caminho):
+            temporario = f"{caminho}.tmp"
+            with open(temporario, "wb") as f:
+                f.write(conteudo)
+            os.replace(temporario, caminho)
+            gravados += 1
+
+        manifesto_shards[prefixo] = {
+            "arquivo": f"{SHARDS_SUBDIR}/{nome}",
+            "sha256": sha256,
+            "produtos": len(codigos),
+        }
+
+    # Shards da geração anterior continuam em disco enquanto o manifesto
+    # antigo pode estar em cache; só o que não está em nenhum dos dois sai
+    caminho_manifesto = os.path.join(diretorio, MANIFESTO_FILE)
+    ativos = {os.path.basename(s["arquivo"]) for s in manifesto_shards.values()}
+    anteriores = shards_anteriores(caminho_manifesto, ativos)
+    removidos = 0
+    for nome in os.listdir(pasta_shards):
+        if nome.endswith(".json") and nome not in ativos and nome not in anteriores:
+            os.remove(os.path.join(pasta_shards, nome))
+            removidos += 1
+
+    manifesto = {
+        "versao": VERSAO_FORMATO,
+        "campos": list(CAMPOS),
+        "total_produtos": len(produtos_por_codigo),
+        "shards": manifesto_shards,
+        "shards_anteriores": sorted(anteriores),
+    }
+    temporario = f"{caminho_manifesto}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho_manifesto)
+
+    return {"shards": len(manifesto_shards), "gravados": gravados, "removidos": removidos}
+
+
+def main():
+    """Função principal do exportador de shards."""
+    parser = argparse.ArgumentParser(
+        description="Exportar catálogo em shards estáticos por prefixo de GTIN"
+    )
+    parser.add_argument("--dataset", default=DATASET_FILE, help="JSON verificado")
+    parser.add_argument("--saida", default=OUTPUT_DIR, help="Diretório de saída")
+    parser.add_argument(
+        "--max-por-shard",
+        type=int,
+        default=MAX_POR_SHARD_PADRAO,
+        help=f"Máximo de produtos por shard (padrão: {MAX_POR_SHARD_PADRAO})",
+    )
+    argumentos = parser.parse_args()
+
+    if not os.path.exists(argumentos.dataset):
+        print(f"❌ Arquivo {argumentos.dataset} não encontrado. Rode o verificar_imagens.py antes.")
+        sys.exit(1)
+
+    print("📦 Exportando shards do catálogo...")
+    with open(argumentos.dataset, "r", encoding="utf-8") as f:
+        produtos = json.load(f)
+
+    estatisticas = exportar(produtos, argumentos.saida, argumentos.max_por_shard)
+
+    print(f"✅ Concluído! Shards: {estatisticas['shards']}, "
+          f"Gravados: {estatisticas['gravados']}, Removidos: {estatisticas['removidos']}")
+
+
+if __name__ == "__main__":
+    main()
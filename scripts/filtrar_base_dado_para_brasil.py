@@ -85,22 +85,26 @@ def exibir_progresso(lidos, salvos, bytes_lidos, total_bytes, tempo_decorrido):
     sys.stdout.write(linha + '   ')
     sys.stdout.flush()
 
-def processar():
-    """Processa o arquivo JSONL.GZ e gera CSV filtrado."""
+def processar(input_file=INPUT_FILE, output_file=OUTPUT_FILE):
+    """
+    Processa o arquivo JSONL.GZ e gera CSV filtrado.
+
+    :return: True se o CSV foi gerado por completo, False caso contrário
+    """
     print(f"\n{Cores.NEGRITO}{'='*60}{Cores.RESET}")
     print(f"{Cores.VERDE}🚀 PROCESSADOR DE DADOS - Sem Susto{Cores.RESET}")
     print(f"{Cores.NEGRITO}{'='*60}{Cores.RESET}\n")
     
     # Verifica arquivo de entrada
-    if not os.path.exists(INPUT_FILE):
-        print(f"{Cores.VERMELHO}❌ Arquivo não encontrado: {INPUT_FILE}{Cores.RESET}")
+    if not os.path.exists(input_file):
+        print(f"{Cores.VERMELHO}❌ Arquivo não encontrado: {input_file}{Cores.RESET}")
         print(f"   Baixe em: https://static.openfoodfacts.org/data/openfoodfacts-products.jsonl.gz")
-        return
+        return False
     
     # Tamanho do arquivo para calcular progresso
-    tamanho_arquivo = os.path.getsize(INPUT_FILE)
-    print(f"📁 Arquivo: {INPUT_FILE} ({formatar_bytes(tamanho_arquivo)})")
-    print(f"🎯 Destino: {OUTPUT_FILE}\n")
+    tamanho_arquivo = os.path.getsize(input_file)
+    print(f"📁 Arquivo: {input_file} ({formatar_bytes(tamanho_arquivo)})")
+    print(f"🎯 Destino: {output_file}\n")
     
     inicio = time.time()
     total_lidos = 0
@@ -109,8 +113,8 @@ def processar():
     
     try:
         # Abre arquivo compactado em modo BINÁRIO para velocidade
-        with gzip.open(INPUT_FILE, 'rb') as f_in, \
-             open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f_out:
+        with gzip.open(input_file, 'rb') as f_in, \
+             open(output_file, 'w', newline='', encoding='utf-8') as f_out:
             
             writer = csv.writer(f_out, quoting=csv.QUOTE_ALL)
             writer.writerow(['raw_data'])
@@ -153,10 +157,10 @@ def processar():
                     
     except KeyboardInterrupt:
         print(f"\n\n{Cores.AMARELO}⚠️  Cancelado pelo usuário.{Cores.RESET}")
-        return
+        return False
     except Exception as e:
         print(f"\n{Cores.VERMELHO}❌ Erro: {e}{Cores.RESET}")
-        return
+        return False
 
     tempo_total = time.time() - inicio
     
@@ -167,14 +171,15 @@ def processar():
     print(f"   📊 Total de linhas lidas: {total_lidos:,}")
     print(f"   🇧🇷 Produtos brasileiros:  {total_salvos:,}")
     print(f"   ⏱️  Tempo total:           {formatar_tempo(tempo_total)}")
-    print(f"   📁 Arquivo gerado:        {OUTPUT_FILE}")
+    print(f"   📁 Arquivo gerado:        {output_file}")
     
     # Tamanho do arquivo de saída
-    if os.path.exists(OUTPUT_FILE):
-        tamanho_saida = os.path.getsize(OUTPUT_FILE)
+    if os.path.exists(output_file):
+        tamanho_saida = os.path.getsize(output_file)
         print(f"   💾 Tamanho do CSV:        {formatar_bytes(tamanho_saida)}")
     
     print(f"{Cores.NEGRITO}{'='*60}{Cores.RESET}\n")
+    return True
 
 if __name__ == "__main__":
     processar()
@@ -0,0 +1,290 @@
+"""
+Filtro de Bloom com todos os GTINs do catálogo higienizado.
+
+Boa parte dos scans é de produtos que o catálogo derivado do OpenFoodFacts
+simplesmente não tem — e cada um deles custa uma consulta ao banco antes do
+fallback para o Cosmos. Com o filtro, quem chama decide "com certeza não está
+no catálogo" sem nenhuma I/O (falsos positivos ≈ 1%, falsos negativos nunca).
+
+**Formato binário (versão 1, little-endian):**
+
+.. code-block:: text
+
+    offset  tamanho  campo
+    0       4        magic "SSBF"
+    4       1        versão do formato (1)
+    5       1        k (número de funções de hash)
+    6       2        reservado (0)
+    8       8        m (número de bits)
+    16      8        n (GTINs inseridos)
+    24      4        CRC32 do vetor de bits
+    28      m/8      vetor de bits (bit i = byte i >> 3, máscara 1 << (i & 7))
+
+As posições usam hashing duplo sobre o SHA-256 do GTIN canônico:
+``h1, h2 = uint64 LE dos bytes [0:8] e [8:16]``;
+``posicao_i = (h1 + i * h2) mod m``. SHA-256 foi escolhido por estar
+disponível também no navegador (``crypto.subtle``).
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Gera public/catalogo/gtins.bloom
+    python scripts/filtro_gtins.py construir
+
+    # Mede tempo de construção, tamanho e vazão de consultas
+    python scripts/filtro_gtins.py benchmark
+
+.. code-block:: python
+
+    filtro = FiltroBloom.carregar("public/catalogo/gtins.bloom")
+    if "7891000100103" not in filtro:
+        ...  # Com certeza não está no catálogo: vai direto para o Cosmos
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from typing import Iterable
+
+from medicao import formatar_bytes
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+DATASET_FILE = "produtos_higienizados.json"
+FILTRO_FILE = "public/catalogo/gtins.bloom"
+
+MAGIC = b"SSBF"
+VERSAO_FORMATO = 1
+CABECALHO = struct.Struct("<4sBBHQQI")
+
+TAXA_FALSO_POSITIVO_PADRAO = 0.01
+MASCARA_64 = (1 << 64) - 1
+
+
+def canonizar_gtin(codigo) -> str:
+    """
+    Normaliza um código de barras para a forma canônica do catálogo.
+
+    Mantém só dígitos e remove zeros à esquerda (o mesmo GTIN pode chegar
+    como EAN-13 ``0789...`` ou GTIN-14 ``00789...``).
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        canonizar_gtin("0007891000100103")  # Output: '7891000100103'
+
+    :param codigo: Código lido pelo scanner ou vindo do dataset
+    :return: GTIN canônico (string vazia se não houver dígitos)
+    """
+    digitos = "".join(c for c in str(codigo) if c.isdigit())
+    return digitos.lstrip("0")
+
+
+def dimensionar(quantidade: int, taxa_falso_positivo: float):
+    """
+    Calcula o tamanho ótimo do filtro.
+
+    :param quantidade: Número de elementos esperados
+    :param taxa_falso_positivo: Taxa de falsos positivos desejada (ex: 0.01)
+    :return: Tupla ``(m, k)`` — bits (múltiplo de 8) e funções de hash
+    """
+    quantidade = max(quantidade, 1)
+    m = math.ceil(-quantidade * math.log(taxa_falso_positivo) / (math.log(2) ** 2))
+    m = (m + 7) // 8 * 8
+    k = max(1, round(m / quantidade * math.log(2)))
+    return m, k
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom somente-adição com serialização no formato ``SSBF``.
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        filtro = FiltroBloom.construir(["7891000100103", "7894900011517"])
+        "7891000100103" in filtro  # Output: True
+        filtro.salvar("gtins.bloom")
+    """
+
+    def __init__(self, m: int, k: int, bits: bytearray = None, quantidade: int = 0):
+        self.m = m
+        self.k = k
+        self.bits = bits if bits is not None else bytearray(m // 8)
+        self.quantidade = quantidade
+
+    def _posicoes(self, gtin: str):
+        digest = hashlib.sha256(gtin.encode()).digest()
+        h1, h2 = struct.unpack_from("<QQ", digest)
+        for i in range(self.k):
+            yield ((h1 + i * h2) & MASCARA_64) % self.m
+
+    def adicionar(self, codigo):
+        """Insere um código (canonizado) no filtro."""
+        for posicao in self._posicoes(canonizar_gtin(codigo)):
+            self.bits[posicao >> 3] |= 1 << (posicao & 7)
+        self.quantidade += 1
+
+    def __contains__(self, codigo) -> bool:
+        bits = self.bits
+        return all(
+            bits[posicao >> 3] & (1 << (posicao & 7))
+            for posicao in self._posicoes(canonizar_gtin(codigo))
+        )
+
+    @classmethod
+    def construir(cls, codigos: Iterable, taxa_falso_positivo: float = TAXA_FALSO_POSITIVO_PADRAO) -> "FiltroBloom":
+        """
+        Constrói um filtro dimensionado para os códigos informados.
+
+        :param codigos: Códigos de barras (duplicados são ignorados)
+        :param taxa_falso_positivo: Taxa de falsos positivos desejada
+        :return: Filtro preenchido
+        """
+        unicos = {canonizar_gtin(c) for c in codigos} - {""}
+        m, k = dimensionar(len(unicos), taxa_falso_positivo)
+        filtro = cls(m, k)
+        for gtin in unicos:
+            filtro.adicionar(gtin)
+        return filtro
+
+    def salvar(self, caminho: str):
+        """Grava o filtro no formato binário versionado (escrita atômica)."""
+        cabecalho = CABECALHO.pack(
+            MAGIC, VERSAO_FORMATO, self.k, 0, self.m, self.quantidade, zlib.crc32(self.bits)
+        )
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temporario = f"{caminho}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(cabecalho)
+            f.write(self.bits)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "FiltroBloom":
+        """
+        Lê um filtro gravado por :meth:`salvar`, validando magic, versão e CRC.
+
+        :param caminho: Caminho do arquivo ``.bloom``
+        :return: Filtro pronto para consultas
+        :raises ValueError: Se o arquivo não for um filtro válido
+        """
+        with open(caminho, "rb") as f:
+            dados = f.read()
+
+        if len(dados) < CABECALHO.size:
+            raise ValueError("Arquivo de filtro truncado")
+        magic, versao, k, _, m, quantidade, crc = CABECALHO.unpack_from(dados)
+        if magic != MAGIC:
+            raise ValueError("Arquivo não é um filtro de GTINs (magic inválido)")
+        if versao != VERSAO_FORMATO:
+            raise ValueError(f"Versão de filtro não suportada: {versao}")
+
+        bits = bytearray(dados[CABECALHO.size:])
+        if len(bits) != m // 8 or zlib.crc32(bits) != crc:
+            raise ValueError("Filtro corrompido (tamanho ou CRC32 não conferem)")
+        return cls(m, k, bits, quantidade)
+
+
+def carregar_codigos(caminho: str) -> list:
+    """Lê os códigos de barras do JSON higienizado."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [p["codigo_barras"] for p in json.load(f)]
+
+
+def benchmark(codigos: list, taxa_falso_positivo: float, consultas: int):
+    """
+    Mede construção, tamanho, vazão de consultas e taxa real de falsos positivos.
+
+    :param codigos: Códigos do catálogo
+    :param taxa_falso_positivo: Taxa alvo
+    :param consultas: Quantidade de consultas para medir a vazão
+    """
+    inicio = time.perf_counter()
+    filtro = FiltroBloom.construir(codigos, taxa_falso_positivo)
+    construcao = time.perf_counter() - inicio
+
+    presentes = {canonizar_gtin(c) for c in codigos}
+    gerador = random.Random(42)
+    lista_presentes = sorted(presentes)
+    amostra_presentes = [gerador.choice(lista_presentes) for _ in range(consultas)]
+    ausentes = []
+    while len(ausentes) < consultas:
+        candidato = f"789{gerador.randrange(10 ** 10):010d}"
+        if candidato not in presentes:
+            ausentes.append(candidato)
+
+    inicio = time.perf_counter()
+    for codigo in amostra_presentes:
+        codigo in filtro
+    tempo_presentes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    falsos_positivos = sum(1 for codigo in ausentes if codigo in filtro)
+    tempo_ausentes = time.perf_counter() - inicio
+
+    print(f"   📊 GTINs únicos:        {filtro.quantidade:,}")
+    print(f"   ⚙️ m={filtro.m:,} bits, k={filtro.k}")
+    print(f"   💾 Tamanho:             {formatar_bytes(CABECALHO.size + len(filtro.bits))}")
+    print(f"   ⏱️ Construção:          {construcao:.2f}s")
+    print(f"   🚀 Consultas presentes: {consultas / tempo_presentes:,.0f}/s")
+    print(f"   🚀 Consultas ausentes:  {consultas / tempo_ausentes:,.0f}/s")
+    print(f"   🎯 Falsos positivos:    {falsos_positivos / consultas:.2%} (alvo {taxa_falso_positivo:.2%})")
+
+
+def main():
+    """Função principal: construir, consultar ou medir o filtro."""
+    parser = argparse.ArgumentParser(description="Filtro de Bloom dos GTINs do catálogo")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_construir = subcomandos.add_parser("construir", help="Gera o filtro a partir do dataset")
+    p_construir.add_argument("--dataset", default=DATASET_FILE)
+    p_construir.add_argument("--saida", default=FILTRO_FILE)
+    p_construir.add_argument("--taxa", type=float, default=TAXA_FALSO_POSITIVO_PADRAO)
+
+    p_consultar = subcomandos.add_parser("consultar", help="Verifica se GTINs podem estar no catálogo")
+    p_consultar.add_argument("codigos", nargs="+")
+    p_consultar.add_argument("--filtro", default=FILTRO_FILE)
+
+    p_benchmark = subcomandos.add_parser("benchmark", help="Mede construção, tamanho e vazão")
+    p_benchmark.add_argument("--dataset", default=DATASET_FILE)
+    p_benchmark.add_argument("--taxa", type=float, default=TAXA_FALSO_POSITIVO_PADRAO)
+    p_benchmark.add_argument("--consultas", type=int, default=100_000)
+
+    argumentos = parser.parse_args()
+
+    if argumentos.comando in ("construir", "benchmark") and not os.path.exists(argumentos.dataset):
+        print(f"❌ Arquivo {argumentos.dataset} não encontrado. Rode o clean_dataset.py antes.")
+        sys.exit(1)
+
+    if argumentos.comando == "construir":
+        print("🧮 Construindo filtro de GTINs...")
+        filtro = FiltroBloom.construir(carregar_codigos(argumentos.dataset), argumentos.taxa)
+        filtro.salvar(argumentos.saida)
+        print(f"✅ {filtro.quantidade:,} GTINs em {formatar_bytes(os.path.getsize(argumentos.saida))} "
+              f"(k={filtro.k}) salvos em {argumentos.saida}")
+
+    elif argumentos.comando == "consultar":
+        filtro = FiltroBloom.carregar(argumentos.filtro)
+        for codigo in argumentos.codigos:
+            situacao = "pode estar no catálogo" if codigo in filtro else "com certeza NÃO está no catálogo"
+            print(f"   {codigo}: {situacao}")
+
+    elif argumentos.comando == "benchmark":
+        print("⏱️ Benchmark do filtro de GTINs...")
+        benchmark(carregar_codigos(argumentos.dataset), argumentos.taxa, argumentos.consultas)
+
+
+if __name__ == "__main__":
+    main()
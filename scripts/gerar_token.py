@@ -16,9 +16,6 @@ import secrets
 
 from dotenv import load_dotenv
 
-# Carrega variáveis do arquivo .env de desenvolvimento
-load_dotenv('.env')
-
 # Importar psycopg2 para conexão com PostgreSQL
 try:
     import psycopg2
@@ -31,11 +28,6 @@ except ImportError:
 # CONFIGURAÇÃO
 # =============================================================================
 
-DATABASE_URL = os.getenv('DATABASE_URL')
-if not DATABASE_URL:
-    print('❌ DATABASE_URL não definida. Configure no .env ou nas variáveis de ambiente.')
-    sys.exit(1)
-
 # Charset Base30 — mesmos caracteres usados no TypeScript (api/_lib/tokens.ts)
 # Exclui ambíguos: 0, O, 1, I, L
 CHARSET_BASE30 = 'ABCDEFGHJKMNPQRSTUVWXYZ2345678'
@@ -95,6 +87,14 @@ def main():
 
     argumentos = parser.parse_args()
 
+    # Carrega variáveis do arquivo .env de desenvolvimento
+    load_dotenv('.env')
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print('❌ DATABASE_URL não definida. Configure no .env ou nas variáveis de ambiente.')
+        sys.exit(1)
+
     plano = argumentos.plano
     duracao_dias = argumentos.duracao or DURACAO_POR_PLANO[plano]
 
@@ -110,7 +110,7 @@ def main():
 
     # Insere no banco
     try:
-        conexao = psycopg2.connect(dsn=DATABASE_URL)
+        conexao = psycopg2.connect(dsn=database_url)
         cursor = conexao.cursor()
 
         cursor.execute(
@@ -0,0 +1,435 @@
+"""
+Índice de prefixos pré-computado para autocomplete de produtos.
+
+O índice GIN de ``to_tsvector('portuguese', descricao)`` não casa prefixos
+("lei" não encontra "leite") e custa uma ida ao banco por tecla digitada.
+Este script gera, a partir do catálogo higienizado, um índice compacto com:
+
+- **Termos**: lista ordenada de palavras do rótulo (``descricao``, ``marca``
+  e ``tamanho``), sem acentos e em minúsculas (``"Açúcar"`` → ``"acucar"``).
+- **Postings**: para cada termo, os ids dos produtos que o contêm
+  (codificados em delta para ocupar menos espaço).
+- **Documentos**: dois vetores paralelos, ``codigos`` e ``rotulos`` (texto
+  de exibição compacto: ``"Leite Integral · Italac · 1L"``), ordenados por
+  relevância — o id do documento **é** o seu ranking, então percorrer
+  postings em ordem crescente já devolve os melhores primeiro. Os demais
+  campos do produto ficam nos shards por GTIN (``exportar_shards.py``).
+
+A consulta por prefixo é uma busca binária na lista de termos seguida de um
+merge das postings do intervalo encontrado. A última palavra digitada é
+sempre tratada como prefixo (``"com"`` encontra ``"comida"``); stopwords só
+são descartadas quando a palavra já está completa.
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Gera public/catalogo/autocomplete.json
+    python scripts/indice_autocomplete.py construir
+
+    # Consulta interativa
+    python scripts/indice_autocomplete.py consultar "leite ita"
+
+    # Compara latência com o Full Text Search do Postgres (usa DATABASE_URL)
+    python scripts/indice_autocomplete.py benchmark
+
+.. code-block:: python
+
+    indice = IndiceAutocomplete.carregar("public/catalogo/autocomplete.json")
+    indice.consultar("leite ita", limite=5)
+    # [{'codigo_barras': '789...', 'rotulo': 'Leite Integral · Italac · 1L'}, ...]
+
+.. note::
+   O arquivo **não** é pequeno: em um catálogo sintético de 150k produtos
+   ficou com ~10.5 MB (~2.5 MB com gzip). Os rótulos são ~60% do tamanho
+   bruto, os códigos ~22% e as postings ~19%. Os rótulos ficam no índice de
+   propósito: a sugestão aparece sem uma segunda requisição aos shards e o
+   filtro das palavras anteriores à última roda sobre eles. O custo é um
+   download único de alguns MB (cache longo na CDN), e não um arquivo leve
+   para redes móveis ruins.
+"""
+import argparse
+import bisect
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+from medicao import cronometrar, resumir_latencias, formatar_bytes
+from texto import dobrar_acentos
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+DATASET_FILE = "produtos_higienizados.json"
+INDICE_FILE = "public/catalogo/autocomplete.json"
+VERSAO_FORMATO = 2
+
+LIMITE_PADRAO = 10
+TAMANHO_MINIMO_TERMO = 2
+
+# Palavras muito frequentes que só poluem as postings
+STOPWORDS = {"de", "da", "do", "das", "dos", "com", "sem", "e", "em", "para", "a", "o"}
+
+# Valores de preenchimento do clean_dataset que não vão para o rótulo
+MARCA_VAZIA = "Sem Marca"
+TAMANHO_VAZIO = "Sem Tamanho"
+SEPARADOR_ROTULO = " · "
+
+REGEX_TERMO = re.compile(r"[a-z0-9]+")
+
+# Consultas representativas de digitação (prefixos parciais)
+CONSULTAS_BENCHMARK = ["lei", "leite int", "arr", "cafe pil", "bisc", "refri", "sab", "choc nes", "mac", "ac"]
+
+
+def tokenizar(texto: str) -> List[str]:
+    """
+    Quebra o texto em termos indexáveis (sem acentos, sem stopwords).
+
+    :param texto: Texto original (descrição ou marca)
+    :return: Lista de termos na ordem em que aparecem
+    """
+    return [
+        termo for termo in REGEX_TERMO.findall(dobrar_acentos(texto or ""))
+        if len(termo) >= TAMANHO_MINIMO_TERMO and termo not in STOPWORDS
+    ]
+
+
+def rotular(produto: dict) -> str:
+    """
+    Monta o texto de exibição compacto de um produto.
+
+    A marca e o tamanho só entram se tiverem valor e ainda não aparecerem na
+    descrição (o OFF costuma repetir a marca no nome do produto).
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        rotular({"descricao": "Leite Integral", "marca": "Italac", "tamanho": "1L"})
+        # Output: 'Leite Integral · Italac · 1L'
+
+    :param produto: Produto higienizado
+    :return: Rótulo usado na sugestão e na indexação
+    """
+    descricao = produto["descricao"]
+    descricao_dobrada = dobrar_acentos(descricao)
+    partes = [descricao]
+    for campo, vazio in (("marca", MARCA_VAZIA), ("tamanho", TAMANHO_VAZIO)):
+        valor = produto.get(campo)
+        if valor and valor != vazio and dobrar_acentos(valor) not in descricao_dobrada:
+            partes.append(valor)
+    return SEPARADOR_ROTULO.join(partes)
+
+
+def pontuar(produto: dict, frequencia_marcas: Counter) -> float:
+    """
+    Calcula a relevância de um produto para ordenação das sugestões.
+
+    Combina completude do cadastro (imagem, marca, tamanho, preço) com a
+    popularidade da marca no catálogo (escala logarítmica).
+
+    :param produto: Produto higienizado
+    :param frequencia_marcas: Quantidade de produtos por marca
+    :return: Pontuação (maior é melhor)
+    """
+    pontos = 0.0
+    if produto.get("imagem"):
+        pontos += 2
+    if produto.get("marca") and produto["marca"] != "Sem Marca":
+        pontos += 1
+        pontos += math.log10(1 + frequencia_marcas[produto["marca"]])
+    if produto.get("tamanho") and produto["tamanho"] != "Sem Tamanho":
+        pontos += 1
+    if produto.get("preco_estimado"):
+        pontos += 1
+    return pontos
+
+
+def construir(produtos: list) -> dict:
+    """
+    Constrói o índice serializável a partir dos produtos higienizados.
+
+    :param produtos: Lista de produtos do ``produtos_higienizados.json``
+    :return: Dicionário pronto para ``json.dump``
+    """
+    # Primeiro registro vence em caso de GTIN repetido (mesma regra do
+    # ON CONFLICT DO NOTHING do init_db.py e do exportar_shards.py)
+    produtos_por_codigo = {}
+    for produto in produtos:
+        produtos_por_codigo.setdefault(str(produto["codigo_barras"]), produto)
+    unicos = list(produtos_por_codigo.values())
+
+    frequencia_marcas = Counter(p.get("marca") for p in unicos)
+
+    # Ordena por relevância (desempate: descrição mais curta primeiro)
+    ordenados = sorted(
+        unicos,
+        key=lambda p: (-pontuar(p, frequencia_marcas), len(p["descricao"]), str(p["codigo_barras"])),
+    )
+
+    postings: Dict[str, List[int]] = {}
+    codigos = []
+    rotulos = []
+    for doc_id, produto in enumerate(ordenados):
+        rotulo = rotular(produto)
+        codigos.append(str(produto["codigo_barras"]))
+        rotulos.append(rotulo)
+        for termo in set(tokenizar(rotulo)):
+            postings.setdefault(termo, []).append(doc_id)
+
+    termos_ordenados = sorted(postings)
+    return {
+        "versao": VERSAO_FORMATO,
+        "termos": termos_ordenados,
+        "postings": [codificar_delta(postings[t]) for t in termos_ordenados],
+        "codigos": codigos,
+        "rotulos": rotulos,
+    }
+
+
+def codificar_delta(ids: List[int]) -> List[int]:
+    """Converte ids crescentes em diferenças sucessivas (números menores no JSON)."""
+    return [ids[0]] + [ids[i] - ids[i - 1] for i in range(1, len(ids))]
+
+
+def decodificar_delta(deltas: List[int]) -> List[int]:
+    """Inverso de :func:`codificar_delta`."""
+    ids = []
+    acumulado = 0
+    for delta in deltas:
+        acumulado += delta
+        ids.append(acumulado)
+    return ids
+
+
+class IndiceAutocomplete:
+    """
+    API de consulta do índice de prefixos.
+
+    Carrega o arquivo gerado por :func:`construir` e responde consultas por
+    prefixo sem nenhuma I/O adicional.
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        indice = IndiceAutocomplete.carregar("public/catalogo/autocomplete.json")
+        for sugestao in indice.consultar("arroz tio", limite=3):
+            print(sugestao["rotulo"])
+    """
+
+    def __init__(self, dados: dict):
+        if dados.get("versao") != VERSAO_FORMATO:
+            raise ValueError(f"Versão de índice não suportada: {dados.get('versao')}")
+        self.termos: List[str] = dados["termos"]
+        self.postings: List[List[int]] = [decodificar_delta(p) for p in dados["postings"]]
+        self.codigos: List[str] = dados["codigos"]
+        self.rotulos: List[str] = dados["rotulos"]
+        self._termos_documento: Optional[List[List[str]]] = None
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "IndiceAutocomplete":
+        """
+        Lê o índice serializado do disco.
+
+        :param caminho: Caminho do ``autocomplete.json``
+        :return: Instância pronta para consultas
+        """
+        with open(caminho, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _intervalo(self, prefixo: str) -> range:
+        """Índices da lista de termos que começam com ``prefixo`` (busca binária)."""
+        inicio = bisect.bisect_left(self.termos, prefixo)
+        fim = bisect.bisect_left(self.termos, prefixo + "\uffff", lo=inicio)
+        return range(inicio, fim)
+
+    def _total_postings(self, prefixo: str) -> int:
+        """Quantidade de postings no intervalo do prefixo (estimativa de seletividade)."""
+        return sum(len(self.postings[i]) for i in self._intervalo(prefixo))
+
+    def _ids_por_prefixo(self, prefixo: str) -> Iterator[int]:
+        """Ids de documentos (em ordem de ranking, sem repetição) que casam o prefixo."""
+        ultimo = -1
+        for doc_id in heapq.merge(*(self.postings[i] for i in self._intervalo(prefixo))):
+            if doc_id != ultimo:
+                ultimo = doc_id
+                yield doc_id
+
+    def _termos_do_documento(self, doc_id: int) -> List[str]:
+        """
+        Palavras do rótulo de um documento (calculadas sob demanda e memorizadas).
+
+        Inclui stopwords, que não estão nas postings mas podem ser a palavra
+        parcial da consulta (``"comida de"``).
+        """
+        if self._termos_documento is None:
+            self._termos_documento = [None] * len(self.rotulos)
+        termos = self._termos_documento[doc_id]
+        if termos is None:
+            termos = REGEX_TERMO.findall(dobrar_acentos(self.rotulos[doc_id]))
+            self._termos_documento[doc_id] = termos
+        return termos
+
+    def consultar(self, texto: str, limite: int = LIMITE_PADRAO) -> List[dict]:
+        """
+        Retorna as melhores sugestões para o texto digitado.
+
+        Cada palavra da consulta é tratada como prefixo. A palavra mais
+        seletiva (menos postings no intervalo) gera os candidatos, e as demais
+        filtram pelos termos do documento. Stopwords só são ignoradas quando
+        completas: a última palavra (ainda sendo digitada) nunca é descartada.
+
+        :param texto: Texto digitado pelo usuário (acentos são ignorados)
+        :param limite: Máximo de sugestões
+        :return: Lista de produtos ``{codigo_barras, rotulo}``
+        """
+        palavras = REGEX_TERMO.findall(dobrar_acentos(texto))
+        if not palavras:
+            return []
+
+        # Sem espaço no final, a última palavra ainda pode crescer ("com" → "comida")
+        parcial = [] if texto[-1:].isspace() else [palavras.pop()]
+        prefixos = [p for p in palavras if p not in STOPWORDS] + parcial
+        if not prefixos:
+            return []
+
+        # Um prefixo de stopword não pode gerar os candidatos sozinho: a
+        # stopword em si não está nas postings, só no filtro por documento
+        prefixos.sort(key=lambda p: (
+            len(prefixos) > 1 and any(s.startswith(p) for s in STOPWORDS),
+            self._total_postings(p),
+        ))
+        principal, restantes = prefixos[0], prefixos[1:]
+
+        resultados = []
+        for doc_id in self._ids_por_prefixo(principal):
+            if restantes:
+                termos = self._termos_do_documento(doc_id)
+                if not all(any(t.startswith(p) for t in termos) for p in restantes):
+                    continue
+            resultados.append({"codigo_barras": self.codigos[doc_id], "rotulo": self.rotulos[doc_id]})
+            if len(resultados) >= limite:
+                break
+        return resultados
+
+
+def benchmark_fts(consultas: List[str], repeticoes: int) -> Optional[Dict[str, List[float]]]:
+    """
+    Mede a latência da busca equivalente no Postgres (coluna ``busca`` com índice GIN).
+
+    Usa ``to_tsquery`` com ``:*`` em cada palavra para que o FTS também faça
+    casamento por prefixo. Retorna None se não houver banco disponível.
+
+    :param consultas: Textos de consulta
+    :param repeticoes: Execuções por consulta
+    :return: Dicionário consulta → latências em segundos
+    """
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("   ℹ️ DATABASE_URL não definida. Pulando comparação com o FTS.")
+        return None
+
+    import psycopg2
+
+    sql = """
+        SELECT codigo_barras, descricao, marca, tamanho
+        FROM produtos
+        WHERE busca @@ to_tsquery('portuguese', %s)
+        LIMIT %s
+    """
+    conn = psycopg2.connect(dsn=database_url)
+    cur = conn.cursor()
+    resultados = {}
+    try:
+        for consulta in consultas:
+            tsquery = " & ".join(f"{t}:*" for t in REGEX_TERMO.findall(dobrar_acentos(consulta)))
+
+            def executar():
+                cur.execute(sql, (tsquery, LIMITE_PADRAO))
+                cur.fetchall()
+
+            resultados[consulta] = cronometrar(executar, repeticoes)
+    finally:
+        cur.close()
+        conn.close()
+    return resultados
+
+
+def main():
+    """Função principal: construir, consultar ou comparar o índice."""
+    parser = argparse.ArgumentParser(description="Índice de autocomplete de produtos")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_construir = subcomandos.add_parser("construir", help="Gera o índice a partir do dataset")
+    p_construir.add_argument("--dataset", default=DATASET_FILE)
+    p_construir.add_argument("--saida", default=INDICE_FILE)
+
+    p_consultar = subcomandos.add_parser("consultar", help="Consulta o índice")
+    p_consultar.add_argument("texto")
+    p_consultar.add_argument("--indice", default=INDICE_FILE)
+    p_consultar.add_argument("--limite", type=int, default=LIMITE_PADRAO)
+
+    p_benchmark = subcomandos.add_parser("benchmark", help="Compara latência com o FTS")
+    p_benchmark.add_argument("--indice", default=INDICE_FILE)
+    p_benchmark.add_argument("--repeticoes", type=int, default=200)
+    p_benchmark.add_argument("--sem-banco", action="store_true", help="Não compara com o Postgres")
+
+    argumentos = parser.parse_args()
+
+    if argumentos.comando == "construir":
+        if not os.path.exists(argumentos.dataset):
+            print(f"❌ Arquivo {argumentos.dataset} não encontrado. Rode o clean_dataset.py antes.")
+            sys.exit(1)
+
+        print("🔤 Construindo índice de autocomplete...")
+        inicio = time.time()
+        with open(argumentos.dataset, "r", encoding="utf-8") as f:
+            produtos = json.load(f)
+        indice = construir(produtos)
+
+        os.makedirs(os.path.dirname(argumentos.saida) or ".", exist_ok=True)
+        with open(argumentos.saida, "w", encoding="utf-8") as f:
+            json.dump(indice, f, ensure_ascii=False, separators=(",", ":"))
+
+        with open(argumentos.saida, "rb") as f:
+            comprimido = len(gzip.compress(f.read()))
+        print(f"✅ {len(indice['termos'])} termos, {len(indice['codigos'])} produtos, "
+              f"{formatar_bytes(os.path.getsize(argumentos.saida))} "
+              f"({formatar_bytes(comprimido)} com gzip) em {time.time() - inicio:.1f}s")
+
+    elif argumentos.comando == "consultar":
+        indice = IndiceAutocomplete.carregar(argumentos.indice)
+        for sugestao in indice.consultar(argumentos.texto, argumentos.limite):
+            print(f"   {sugestao['codigo_barras']:>14}  {sugestao['rotulo']}")
+
+    elif argumentos.comando == "benchmark":
+        inicio = time.time()
+        indice = IndiceAutocomplete.carregar(argumentos.indice)
+        print(f"⏱️ Índice carregado em {time.time() - inicio:.2f}s")
+
+        print("\n📊 Índice de prefixos (em memória):")
+        for consulta in CONSULTAS_BENCHMARK:
+            amostras = cronometrar(lambda: indice.consultar(consulta), argumentos.repeticoes)
+            print(f"   {consulta!r:14} {resumir_latencias(amostras)}")
+
+        if not argumentos.sem_banco:
+            fts = benchmark_fts(CONSULTAS_BENCHMARK, argumentos.repeticoes)
+            if fts:
+                print("\n📊 Postgres FTS (GIN em produtos.busca):")
+                for consulta, amostras in fts.items():
+                    print(f"   {consulta!r:14} {resumir_latencias(amostras)}")
+
+
+if __name__ == "__main__":
+    main()
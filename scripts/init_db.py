@@ -2,7 +2,8 @@
 Script de inicialização do banco de dados PostgreSQL.
 
 Executa migrations de forma idempotente (pode rodar múltiplas vezes sem erros)
-e importa dados do arquivo JSON de produtos higienizados.
+e importa dados do arquivo JSON de produtos verificados (saída do
+``verificar_imagens.py``, com as URLs de imagem já checadas).
 
 **Exemplo:**
 
@@ -11,8 +12,13 @@ e importa dados do arquivo JSON de produtos higienizados.
     # Dentro do container
     python scripts/init_db.py
 
+    # Importa a partir do snapshot colunar do dataset verificado
+    python scripts/catalogo_colunar.py converter --dataset produtos_verificados.json --colunar produtos_verificados.parquet
+    python scripts/init_db.py --dataset produtos_verificados.parquet
+
     # Para resetar o banco completamente, altere RESETAR_BANCO para True
 """
+import argparse
 import psycopg2
 from psycopg2.extras import execute_values
 import json
@@ -33,15 +39,33 @@ AMBIENTE = os.getenv("PG_ENV")
 # =============================================================================
 # CONFIGURAÇÃO DE CONEXÃO
 # =============================================================================
-# Carrega variáveis do arquivo .env de desenvolvimento
-load_dotenv(".env")
+MIGRATIONS_DIR = "infra/migrations"
+DATASET_FILE = "produtos_verificados.json"
+CLUSTERS_FILE = "clusters_produtos.json"
 
-# Pega a Connection String (Fonte da Verdade)
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Ordem das colunas lidas do snapshot .parquet (mesma do INSERT)
+COLUNAS_PRODUTO = ["codigo_barras", "descricao", "marca", "tamanho", "imagem", "preco_estimado"]
 
-if not DATABASE_URL:
-    print("❌ Erro: DATABASE_URL não definida. Configure no .env ou nas variáveis de ambiente.")
-    sys.exit(1)
+
+def load_database_url() -> str:
+    """
+    Carrega a DATABASE_URL do .env de desenvolvimento ou do ambiente.
+
+    Feito sob demanda (e não no import do módulo) para que o orquestrador
+    possa importar este script sem exigir banco configurado.
+
+    :return: Connection string do PostgreSQL
+    """
+    load_dotenv(".env")
+
+    # Pega a Connection String (Fonte da Verdade)
+    database_url = os.getenv("DATABASE_URL")
+
+    if not database_url:
+        print("❌ Erro: DATABASE_URL não definida. Configure no .env ou nas variáveis de ambiente.")
+        sys.exit(1)
+
+    return database_url
 
 
 def parse_db_url(url: str) -> dict:
@@ -61,23 +85,18 @@ def parse_db_url(url: str) -> dict:
     }
 
 
-DB_CONFIG = parse_db_url(DATABASE_URL)
-MIGRATIONS_DIR = "infra/migrations"
-DATASET_FILE = "produtos_higienizados.json"
-
-
-def create_database_if_not_exists():
+def create_database_if_not_exists(db_config: dict):
     """Cria o banco de dados da aplicação se não existir."""
-    target_db = DB_CONFIG["database"]
+    target_db = db_config["database"]
     print(f"🔨 Verificando banco de dados '{target_db}'...")
     
     try:
         # Conecta no banco administrativo 'postgres' para criar o novo
         conn = psycopg2.connect(
-            host=DB_CONFIG["host"],
-            port=DB_CONFIG["port"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
+            host=db_config["host"],
+            port=db_config["port"],
+            user=db_config["user"],
+            password=db_config["password"],
             database="postgres" # Banco default de admin
         )
         conn.autocommit = True
@@ -100,7 +119,7 @@ def create_database_if_not_exists():
         print(f"❌ Erro ao verificar/criar banco: {e}")
 
 
-def get_connection():
+def get_connection(database_url: str):
     """
     Tenta conectar ao banco usando a DATABASE_URL.
     Implementa retry com backoff para aguardar o container do Postgres subir.
@@ -108,12 +127,12 @@ def get_connection():
     retries = 30
     while retries > 0:
         try:
-            conn = psycopg2.connect(dsn=DATABASE_URL)
+            conn = psycopg2.connect(dsn=database_url)
             print("✅ Conectado ao PostgreSQL!")
             return conn
         except psycopg2.OperationalError as e:
             if "does not exist" in str(e):
-                create_database_if_not_exists()
+                create_database_if_not_exists(parse_db_url(database_url))
             else:
                 print(f"⏳ Aguardando banco... ({retries}) Erro: {e}")
             
@@ -205,7 +224,7 @@ def register_migration(conn, migration_id: str):
     cur.close()
 
 
-def apply_migrations(conn):
+def apply_migrations(conn, migrations_dir: str = MIGRATIONS_DIR):
     """
     Aplica todas as migrations pendentes em ordem alfabética.
     
@@ -218,7 +237,7 @@ def apply_migrations(conn):
     ensure_migrations_table(conn)
     
     # Lista arquivos .sql ordenados
-    files = sorted([f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql")])
+    files = sorted([f for f in os.listdir(migrations_dir) if f.endswith(".sql")])
     
     if not files:
         print("   ℹ️ Nenhuma migration encontrada.")
@@ -235,7 +254,7 @@ def apply_migrations(conn):
             continue
         
         # Aplica a migration
-        filepath = os.path.join(MIGRATIONS_DIR, filename)
+        filepath = os.path.join(migrations_dir, filename)
         print(f"   📄 Aplicando: {filename}")
         
         cur = conn.cursor()
@@ -264,70 +283,199 @@ def apply_migrations(conn):
     print(f"✅ Migrations concluídas. Aplicadas: {applied_count}, Puladas: {skipped_count}")
 
 
-def import_data(conn):
+def load_clusters(clusters_file: str = CLUSTERS_FILE) -> dict:
+    """
+    Carrega o mapeamento de quase duplicatas gerado por agrupar_duplicatas.py.
+
+    :param clusters_file: Caminho do JSON de clusters
+    :return: Dicionário codigo_barras → cluster_id (vazio se o arquivo não existir)
+    """
+    if not os.path.exists(clusters_file):
+        return {}
+
+    with open(clusters_file, "r", encoding="utf-8") as f:
+        clusters = json.load(f).get("clusters", {})
+
+    print(f"   🧬 {len(clusters)} produtos com cluster de duplicatas.")
+    return clusters
+
+
+def _produto_para_tupla(codigo, descricao, marca, tamanho, imagem, preco, clusters: dict) -> tuple:
+    """Monta a tupla do INSERT, truncando campos para respeitar limites do schema."""
+    return (
+        codigo,
+        descricao,
+        (marca or "Genérica")[:50],
+        (tamanho or "Unidade")[:50],
+        imagem,
+        preco if preco is not None else 0,
+        clusters.get(str(codigo)),
+    )
+
+
+def read_json_batches(dataset_file: str, clusters: dict):
+    """
+    Lê o JSON higienizado e devolve as tuplas do INSERT em um único lote.
+
+    :param dataset_file: JSON de produtos verificados
+    :param clusters: Mapeamento codigo_barras → cluster_id
+    :return: Iterador de listas de tuplas
+    """
+    with open(dataset_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    yield [
+        _produto_para_tupla(
+            item["codigo_barras"],
+            item["descricao"],
+            item.get("marca"),
+            item.get("tamanho"),
+            item.get("imagem"),
+            item.get("preco_estimado", 0),
+            clusters,
+        )
+        for item in data
+    ]
+
+
+def read_parquet_batches(dataset_file: str, clusters: dict):
+    """
+    Lê o snapshot colunar (catalogo_colunar.py) lote a lote.
+
+    As tuplas do INSERT saem das colunas de cada lote: nenhum dict por
+    produto é criado e só um lote fica em memória por vez. Cada valor ainda
+    vira um objeto Python (o ``execute_values`` exige), então o ganho sobre
+    o JSON se limita à leitura; o INSERT domina o tempo da importação
+    (ver ``catalogo_colunar.benchmark``).
+
+    :param dataset_file: Snapshot ``.parquet``
+    :param clusters: Mapeamento codigo_barras → cluster_id
+    :return: Iterador de listas de tuplas
+    """
+    # Import tardio: pyarrow só é necessário quando o snapshot é usado
+    import catalogo_colunar
+
+    for lote in catalogo_colunar.iterar_lotes(dataset_file, colunas=COLUNAS_PRODUTO):
+        colunas = [catalogo_colunar.coluna_para_lista(lote.column(nome)) for nome in COLUNAS_PRODUTO]
+        yield [
+            _produto_para_tupla(*campos, clusters)
+            for campos in zip(*colunas)
+        ]
+
+
+def import_data(conn, dataset_file: str = DATASET_FILE, clusters_file: str = CLUSTERS_FILE):
     """
-    Importa dados do arquivo JSON para a tabela produtos.
+    Importa dados do arquivo JSON (ou do snapshot ``.parquet``) para a tabela produtos.
     Usa ON CONFLICT para ignorar duplicatas (upsert).
+    Se existir o arquivo de clusters, aplica a coluna cluster_id também aos
+    produtos que já estavam no banco (o agrupamento costuma rodar depois da
+    primeira carga).
+
+    Todos os lotes entram na mesma transação: uma falha no meio desfaz a
+    importação inteira.
+
+    :param conn: Conexão ativa com o banco
+    :param dataset_file: JSON de produtos verificados (ou snapshot ``.parquet``)
+    :param clusters_file: JSON de clusters de quase duplicatas
+    :return: False se a importação falhou (transação desfeita), True caso contrário
     """
-    if not os.path.exists(DATASET_FILE):
-        print(f"ℹ️ Arquivo {DATASET_FILE} não encontrado. Pulando importação.")
-        return
+    if not os.path.exists(dataset_file):
+        print(f"ℹ️ Arquivo {dataset_file} não encontrado. Pulando importação.")
+        return True
 
     print("📦 Iniciando importação de dados...")
-    
-    with open(DATASET_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    if not data:
-        print("   ℹ️ Arquivo vazio.")
-        return
+
+    clusters = load_clusters(clusters_file)
+    if dataset_file.endswith(".parquet"):
+        lotes = read_parquet_batches(dataset_file, clusters)
+    else:
+        lotes = read_json_batches(dataset_file, clusters)
 
     insert_query = """
-        INSERT INTO produtos (codigo_barras, descricao, marca, tamanho, imagem, preco_estimado)
+        INSERT INTO produtos (codigo_barras, descricao, marca, tamanho, imagem, preco_estimado, cluster_id)
         VALUES %s
         ON CONFLICT (codigo_barras) DO NOTHING
     """
     
-    values = []
-    for item in data:
-        # Trunca campos para respeitar limites do schema
-        marca = (item.get("marca") or "Genérica")[:50]
-        tamanho = (item.get("tamanho") or "Unidade")[:50]
-        values.append((
-            item["codigo_barras"],
-            item["descricao"],
-            marca,
-            tamanho,
-            item.get("imagem"),
-            item.get("preco_estimado", 0)
-        ))
-    
+    # Produtos já existentes não passam pelo INSERT (DO NOTHING): o
+    # mapeamento de clusters é aplicado a todos em um UPDATE separado
+    cluster_query = """
+        UPDATE produtos AS p
+        SET cluster_id = v.cluster_id
+        FROM (VALUES %s) AS v (codigo_barras, cluster_id)
+        WHERE p.codigo_barras = v.codigo_barras
+          AND p.cluster_id IS DISTINCT FROM v.cluster_id
+        RETURNING p.codigo_barras
+    """
+
     cur = conn.cursor()
     try:
-        execute_values(cur, insert_query, values, page_size=1000)
+        importados = 0
+        atualizados = 0
+        for values in lotes:
+            execute_values(cur, insert_query, values, page_size=1000)
+            importados += len(values)
+            if clusters:
+                atualizados += len(execute_values(
+                    cur,
+                    cluster_query,
+                    [(codigo, cluster_id) for codigo, *_, cluster_id in values],
+                    template="(%s, %s::varchar)",
+                    page_size=1000,
+                    fetch=True,
+                ))
+
+        if not importados:
+            conn.rollback()
+            print("   ℹ️ Arquivo vazio.")
+            return True
+
+        if clusters:
+            print(f"   🧬 cluster_id atualizado em {atualizados} produtos.")
         conn.commit()
-        print(f"✅ Importados {len(values)} produtos com sucesso!")
+        print(f"✅ Importados {importados} produtos com sucesso!")
+        return True
     except Exception as e:
         conn.rollback()
         print(f"❌ Erro na importação: {e}")
+        return False
     finally:
         cur.close()
 
 
-def main():
-    """Função principal que orquestra a inicialização do banco."""
-    conn = get_connection()
+def main(dataset_file: str = DATASET_FILE, clusters_file: str = CLUSTERS_FILE) -> bool:
+    """
+    Função principal que orquestra a inicialização do banco.
+
+    :return: False se a importação dos dados falhou
+    """
+    conn = get_connection(load_database_url())
     
     # Reset opcional (se habilitado)
     if RESETAR_BANCO and AMBIENTE == "development":
         reset_database(conn)
     
     apply_migrations(conn)
-    import_data(conn)
+    sucesso = import_data(conn, dataset_file, clusters_file)
     conn.close()
     
+    if not sucesso:
+        print("\n❌ Inicialização do banco concluída com erro na importação.")
+        return False
+
     print("\n🎉 Inicialização do banco concluída!")
+    return True
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Inicializar o banco e importar o catálogo")
+    parser.add_argument(
+        "--dataset",
+        default=DATASET_FILE,
+        help=f"JSON verificado ou snapshot .parquet (padrão: {DATASET_FILE})",
+    )
+    parser.add_argument("--clusters", default=CLUSTERS_FILE, help="JSON de clusters de duplicatas")
+    argumentos = parser.parse_args()
+
+    if not main(argumentos.dataset, argumentos.clusters):
+        sys.exit(1)
@@ -0,0 +1,85 @@
+"""
+Funções auxiliares para os benchmarks dos scripts de engenharia de dados.
+
+Centraliza o cálculo de percentis e a formatação de resultados para que
+todos os benchmarks reportem latências do mesmo jeito.
+
+**Exemplo:**
+
+.. code-block:: python
+
+    from medicao import cronometrar, resumir_latencias
+
+    amostras = cronometrar(lambda: consultar("lei"), repeticoes=1000)
+    print(resumir_latencias(amostras))  # Output: p50=0.012ms p95=...
+"""
+import time
+from typing import Callable, Dict, List
+
+
+def percentil(amostras: List[float], p: float) -> float:
+    """
+    Calcula o percentil ``p`` (0-100) por interpolação linear.
+
+    :param amostras: Valores medidos (não precisam estar ordenados)
+    :param p: Percentil desejado (ex: 95)
+    :return: Valor do percentil (0.0 se não houver amostras)
+    """
+    if not amostras:
+        return 0.0
+    ordenadas = sorted(amostras)
+    posicao = (len(ordenadas) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenadas) - 1)
+    fracao = posicao - inferior
+    return ordenadas[inferior] + (ordenadas[superior] - ordenadas[inferior]) * fracao
+
+
+def percentis(amostras: List[float]) -> Dict[str, float]:
+    """
+    Retorna p50, p95 e p99 das amostras.
+
+    :param amostras: Latências em segundos
+    :return: Dicionário ``{"p50": ..., "p95": ..., "p99": ...}``
+    """
+    return {f"p{p}": percentil(amostras, p) for p in (50, 95, 99)}
+
+
+def cronometrar(funcao: Callable[[], object], repeticoes: int) -> List[float]:
+    """
+    Executa ``funcao`` várias vezes e mede cada chamada.
+
+    :param funcao: Função sem argumentos a medir
+    :param repeticoes: Quantidade de execuções
+    :return: Lista de latências em segundos
+    """
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+
+def formatar_ms(segundos: float) -> str:
+    """Formata segundos em milissegundos com 3 casas decimais."""
+    return f"{segundos * 1000:.3f}ms"
+
+
+def resumir_latencias(amostras: List[float]) -> str:
+    """
+    Formata p50/p95/p99 em uma linha legível.
+
+    :param amostras: Latências em segundos
+    :return: Texto como ``p50=0.012ms p95=0.030ms p99=0.051ms``
+    """
+    return " ".join(f"{nome}={formatar_ms(valor)}" for nome, valor in percentis(amostras).items())
+
+
+def formatar_bytes(num_bytes: float) -> str:
+    """Formata bytes em unidade legível (KB, MB, GB)."""
+    for unidade in ["B", "KB", "MB", "GB"]:
+        if abs(num_bytes) < 1024.0:
+            return f"{num_bytes:.1f} {unidade}"
+        num_bytes /= 1024.0
+    return f"{num_bytes:.1f} TB"
@@ -0,0 +1,466 @@
+"""
+Orquestrador do pipeline de dados:
+filtrar → higienizar → (agrupar + verificar_imagens) → carregar / filtro_gtins.
+
+Cada etapa declara suas entradas, saídas, código e configuração. Antes de
+executar, o orquestrador calcula uma impressão digital (SHA-256) de tudo isso
+e compara com a última execução registrada em ``.pipeline_estado.json``.
+Se nada mudou e as saídas existem, a etapa é pulada.
+
+- Os módulos de cada etapa (e portanto ``pandas``/``psycopg2``) só são
+  importados quando a etapa realmente roda.
+- O hash de arquivos grandes (o dump do OFF tem vários GB) é memorizado por
+  ``(tamanho, mtime)``: uma re-execução sem mudanças só faz ``stat``.
+- O hash das saídas também é registrado: se as entradas de uma etapa sumirem
+  (ex: o dump do OFF foi apagado) mas as saídas continuarem idênticas às da
+  última execução, a etapa é pulada em vez de interromper o pipeline.
+- Sem estado registrado (primeira execução), saídas que já existem em disco
+  com a entrada ausente são adotadas como estão: quem só tem o
+  ``produtos_brasil_v1.csv`` (sem o dump) roda o pipeline normalmente.
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Roda o pipeline inteiro (pulando o que já está atualizado)
+    python scripts/pipeline.py
+
+    # Roda só a higienização (e o que vier antes dela, se desatualizado)
+    python scripts/pipeline.py higienizar --com-dependencias
+
+    # Mostra o que está pendente sem executar nada
+    python scripts/pipeline.py --status
+
+    # Ignora o cache e reexecuta a carga no banco
+    python scripts/pipeline.py carregar --forcar
+
+.. note::
+   A etapa ``carregar`` inclui o hash da ``DATABASE_URL`` na configuração:
+   apontar para outro banco faz a carga rodar de novo.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+ESTADO_FILE = ".pipeline_estado.json"
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DUMP_FILE = "openfoodfacts-products.jsonl.gz"
+CSV_FILE = "produtos_brasil_v1.csv"
+DATASET_FILE = "produtos_higienizados.json"
+VERIFICADO_FILE = "produtos_verificados.json"
+COLUNAR_FILE = "produtos_higienizados.parquet"
+CLUSTERS_FILE = "clusters_produtos.json"
+MIGRATIONS_DIR = "infra/migrations"
+FILTRO_GTINS_FILE = "public/catalogo/gtins.bloom"
+
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+# Altere para True para a etapa higienizar gravar também o snapshot Parquet
+# (catalogo_colunar.py). Mudar o valor muda a configuração e reexecuta a etapa.
+GERAR_COLUNAR = False
+
+
+def _executar_filtrar(config: dict) -> bool:
+    import filtrar_base_dado_para_brasil
+    return filtrar_base_dado_para_brasil.processar(config["entrada"], config["saida"])
+
+
+def _executar_higienizar(config: dict) -> bool:
+    import clean_dataset
+    clean_dataset.main(config["entrada"], config["saida"], config["colunar"])
+    return True
+
+
+def _executar_agrupar(config: dict) -> bool:
+    import agrupar_duplicatas
+    agrupar_duplicatas.processar(config["entrada"], config["saida"], config["limiar"])
+    return True
+
+
+def _executar_verificar_imagens(config: dict) -> bool:
+    import verificar_imagens
+    resultado = verificar_imagens.processar(config["entrada"], config["saida"])
+    print(f"   🖼️ Reparadas: {resultado['reparadas']}, Anuladas: {resultado['anuladas']}, "
+          f"Falhas transitórias: {resultado['falhas']}")
+    return True
+
+
+def _executar_carregar(config: dict) -> bool:
+    import init_db
+    return init_db.main(config["entrada"], config["clusters"])
+
+
+def _executar_filtro_gtins(config: dict) -> bool:
+    import filtro_gtins
+    filtro = filtro_gtins.FiltroBloom.construir(
+        filtro_gtins.carregar_codigos(config["entrada"]), config["taxa"]
+    )
+    filtro.salvar(config["saida"])
+    print(f"   🧮 {filtro.quantidade:,} GTINs no filtro (k={filtro.k}).")
+    return True
+
+
+def _configuracao_carregar() -> dict:
+    # dotenv é leve; a DATABASE_URL entra só como hash para não vazar no estado
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+    url = os.getenv("DATABASE_URL") or ""
+    return {
+        "entrada": VERIFICADO_FILE,
+        "clusters": CLUSTERS_FILE,
+        "banco": hashlib.sha256(url.encode()).hexdigest(),
+    }
+
+
+class Etapa:
+    """
+    Descrição de uma etapa do pipeline (nó do DAG).
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        etapa = Etapa(
+            nome="higienizar",
+            depende_de=["filtrar"],
+            entradas=["produtos_brasil_v1.csv"],
+            saidas=["produtos_higienizados.json"],
+            codigo=["clean_dataset.py"],
+            configuracao=lambda: {"entrada": "...", "saida": "..."},
+            executar=_executar_higienizar,
+        )
+
+    .. note::
+       Entradas opcionais (que podem não existir) entram no hash como ausentes
+       e não impedem a execução.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        depende_de: List[str],
+        entradas: List[str],
+        saidas: List[str],
+        codigo: List[str],
+        configuracao: Callable[[], dict],
+        executar: Callable[[dict], bool],
+        entradas_opcionais: Optional[List[str]] = None,
+    ):
+        self.nome = nome
+        self.depende_de = depende_de
+        self.entradas = entradas
+        self.entradas_opcionais = entradas_opcionais or []
+        self.saidas = saidas
+        self.codigo = [os.path.join(SCRIPTS_DIR, arquivo) for arquivo in codigo]
+        self.configuracao = configuracao
+        self.executar = executar
+
+
+ETAPAS: Dict[str, Etapa] = {
+    etapa.nome: etapa
+    for etapa in [
+        Etapa(
+            nome="filtrar",
+            depende_de=[],
+            entradas=[DUMP_FILE],
+            saidas=[CSV_FILE],
+            codigo=["filtrar_base_dado_para_brasil.py"],
+            configuracao=lambda: {"entrada": DUMP_FILE, "saida": CSV_FILE},
+            executar=_executar_filtrar,
+        ),
+        Etapa(
+            nome="higienizar",
+            depende_de=["filtrar"],
+            entradas=[CSV_FILE],
+            saidas=[DATASET_FILE] + ([COLUNAR_FILE] if GERAR_COLUNAR else []),
+            codigo=["clean_dataset.py"] + (["catalogo_colunar.py"] if GERAR_COLUNAR else []),
+            configuracao=lambda: {
+                "entrada": CSV_FILE,
+                "saida": DATASET_FILE,
+                "colunar": COLUNAR_FILE if GERAR_COLUNAR else None,
+            },
+            executar=_executar_higienizar,
+        ),
+        Etapa(
+            nome="agrupar",
+            depende_de=["higienizar"],
+            entradas=[DATASET_FILE],
+            saidas=[CLUSTERS_FILE],
+            codigo=["agrupar_duplicatas.py", "texto.py"],
+            configuracao=lambda: {"entrada": DATASET_FILE, "saida": CLUSTERS_FILE, "limiar": 0.7},
+            executar=_executar_agrupar,
+        ),
+        Etapa(
+            nome="verificar_imagens",
+            depende_de=["higienizar"],
+            entradas=[DATASET_FILE],
+            saidas=[VERIFICADO_FILE],
+            codigo=["verificar_imagens.py"],
+            configuracao=lambda: {"entrada": DATASET_FILE, "saida": VERIFICADO_FILE},
+            executar=_executar_verificar_imagens,
+        ),
+        Etapa(
+            nome="carregar",
+            depende_de=["agrupar", "verificar_imagens"],
+            entradas=[VERIFICADO_FILE, CLUSTERS_FILE, MIGRATIONS_DIR],
+            saidas=[],
+            codigo=["init_db.py"],
+            configuracao=_configuracao_carregar,
+            executar=_executar_carregar,
+        ),
+        Etapa(
+            nome="filtro_gtins",
+            depende_de=["higienizar"],
+            entradas=[DATASET_FILE],
+            saidas=[FILTRO_GTINS_FILE],
+            codigo=["filtro_gtins.py"],
+            configuracao=lambda: {"entrada": DATASET_FILE, "saida": FILTRO_GTINS_FILE, "taxa": 0.01},
+            executar=_executar_filtro_gtins,
+        ),
+    ]
+}
+
+
+class CacheHashes:
+    """
+    Calcula SHA-256 de arquivos e diretórios, memorizando por ``(tamanho, mtime)``.
+
+    O cache é persistido junto com o estado do pipeline, então arquivos que
+    não mudaram nunca são relidos entre execuções.
+    """
+
+    def __init__(self, arquivos: dict):
+        self.arquivos = arquivos
+
+    def hash(self, caminho: str) -> Optional[str]:
+        """
+        Retorna o hash de um arquivo ou diretório (None se não existir).
+
+        :param caminho: Caminho relativo ao diretório atual
+        :return: SHA-256 em hexadecimal
+        """
+        if os.path.isdir(caminho):
+            resumo = hashlib.sha256()
+            for nome in sorted(os.listdir(caminho)):
+                resumo.update(f"{nome}:{self.hash(os.path.join(caminho, nome))}\n".encode())
+            return resumo.hexdigest()
+
+        try:
+            estatisticas = os.stat(caminho)
+        except FileNotFoundError:
+            return None
+
+        chave = os.path.normpath(caminho)
+        memorizado = self.arquivos.get(chave)
+        if (
+            memorizado
+            and memorizado["tamanho"] == estatisticas.st_size
+            and memorizado["mtime_ns"] == estatisticas.st_mtime_ns
+        ):
+            return memorizado["sha256"]
+
+        resumo = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b""):
+                resumo.update(bloco)
+
+        self.arquivos[chave] = {
+            "tamanho": estatisticas.st_size,
+            "mtime_ns": estatisticas.st_mtime_ns,
+            "sha256": resumo.hexdigest(),
+        }
+        return resumo.hexdigest()
+
+
+def carregar_estado() -> dict:
+    """Lê o estado da última execução (vazio se não existir)."""
+    if not os.path.exists(ESTADO_FILE):
+        return {"arquivos": {}, "etapas": {}}
+    with open(ESTADO_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def salvar_estado(estado: dict):
+    """Grava o estado de forma atômica (arquivo temporário + rename)."""
+    temporario = f"{ESTADO_FILE}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, ESTADO_FILE)
+
+
+def impressao_digital(etapa: Etapa, hashes: CacheHashes) -> Optional[str]:
+    """
+    Calcula a impressão digital de uma etapa (entradas + código + configuração).
+
+    :param etapa: Etapa a avaliar
+    :param hashes: Cache de hashes de arquivos
+    :return: SHA-256 combinado, ou None se alguma entrada obrigatória não existir
+    """
+    entradas = {caminho: hashes.hash(caminho) for caminho in etapa.entradas}
+    if any(h is None for h in entradas.values()):
+        return None
+    entradas.update({caminho: hashes.hash(caminho) for caminho in etapa.entradas_opcionais})
+
+    conteudo = {
+        "entradas": entradas,
+        "codigo": {os.path.basename(c): hashes.hash(c) for c in etapa.codigo},
+        "configuracao": etapa.configuracao(),
+    }
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode()).hexdigest()
+
+
+def saidas_intactas(etapa: Etapa, registro: dict, hashes: CacheHashes) -> bool:
+    """
+    Verifica se as saídas da etapa são as mesmas gravadas na última execução.
+
+    :param etapa: Etapa a avaliar
+    :param registro: Registro da etapa no estado (``estado["etapas"][nome]``)
+    :param hashes: Cache de hashes de arquivos
+    :return: True se a etapa tem saídas e todas batem com o hash registrado
+    """
+    registradas = registro.get("saidas") or {}
+    return bool(etapa.saidas) and all(
+        registradas.get(saida) is not None and hashes.hash(saida) == registradas[saida]
+        for saida in etapa.saidas
+    )
+
+
+def ordenar_etapas(selecionadas: List[str], com_dependencias: bool) -> List[str]:
+    """
+    Ordena as etapas selecionadas topologicamente.
+
+    :param selecionadas: Nomes pedidos na linha de comando (vazio = todas)
+    :param com_dependencias: Se True, inclui as etapas anteriores no DAG
+    :return: Nomes das etapas na ordem de execução
+    """
+    alvo = set(selecionadas or ETAPAS)
+    if com_dependencias:
+        pendentes = list(alvo)
+        while pendentes:
+            for dependencia in ETAPAS[pendentes.pop()].depende_de:
+                if dependencia not in alvo:
+                    alvo.add(dependencia)
+                    pendentes.append(dependencia)
+
+    ordem = []
+    visitadas = set()
+
+    def visitar(nome: str):
+        if nome in visitadas:
+            return
+        visitadas.add(nome)
+        for dependencia in ETAPAS[nome].depende_de:
+            visitar(dependencia)
+        if nome in alvo:
+            ordem.append(nome)
+
+    for nome in ETAPAS:
+        visitar(nome)
+    return ordem
+
+
+def main():
+    """Função principal do orquestrador."""
+    parser = argparse.ArgumentParser(description="Pipeline de dados do Sem Susto")
+    parser.add_argument("etapas", nargs="*", help=f"Etapas a executar: {', '.join(ETAPAS)} (padrão: todas)")
+    parser.add_argument("--com-dependencias", action="store_true", help="Inclui as etapas anteriores")
+    parser.add_argument("--forcar", action="store_true", help="Ignora o cache e executa mesmo sem mudanças")
+    parser.add_argument("--status", action="store_true", help="Só mostra o que está pendente")
+    argumentos = parser.parse_args()
+
+    desconhecidas = [e for e in argumentos.etapas if e not in ETAPAS]
+    if desconhecidas:
+        parser.error(f"etapa(s) desconhecida(s): {', '.join(desconhecidas)}")
+
+    inicio_total = time.perf_counter()
+    estado = carregar_estado()
+    hashes = CacheHashes(estado["arquivos"])
+
+    for nome in ordenar_etapas(argumentos.etapas, argumentos.com_dependencias):
+        etapa = ETAPAS[nome]
+        impressao = impressao_digital(etapa, hashes)
+        registro = estado["etapas"].get(nome, {})
+        atualizada = (
+            impressao is not None
+            and registro.get("impressao") == impressao
+            and all(os.path.exists(saida) for saida in etapa.saidas)
+        )
+
+        # Entrada apagada depois de processada (ex: dump do OFF): as saídas
+        # registradas continuam válidas para as etapas seguintes. Sem registro
+        # (primeira execução), saídas já existentes em disco são adotadas.
+        adotada = (
+            impressao is None
+            and not registro
+            and bool(etapa.saidas)
+            and all(os.path.exists(saida) for saida in etapa.saidas)
+        )
+        reaproveitada = impressao is None and (adotada or saidas_intactas(etapa, registro, hashes))
+
+        if argumentos.status:
+            if atualizada:
+                situacao = "✅ atualizada"
+            elif adotada:
+                situacao = "✅ saídas existentes adotadas (entrada ausente, sem registro)"
+            elif reaproveitada:
+                situacao = "✅ atualizada (entrada ausente, saídas intactas)"
+            else:
+                situacao = "❌ sem entrada" if impressao is None else "⏳ pendente"
+            print(f"   {nome:17} {situacao}")
+            continue
+
+        if atualizada and not argumentos.forcar:
+            print(f"⏭️ {nome}: nada mudou desde a última execução.")
+            continue
+
+        if impressao is None:
+            ausentes = [e for e in etapa.entradas if not os.path.exists(e)]
+            if adotada:
+                print(f"⏭️ {nome}: entrada(s) ausente(s) ({', '.join(ausentes)}); "
+                      f"adotando as saídas existentes: {', '.join(etapa.saidas)}.")
+                # Registra os hashes: a partir daqui vale a regra das saídas intactas
+                estado["etapas"][nome] = {
+                    "saidas": {saida: hashes.hash(saida) for saida in etapa.saidas},
+                    "adotada_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                continue
+            if reaproveitada:
+                print(f"⏭️ {nome}: entrada(s) ausente(s) ({', '.join(ausentes)}), "
+                      f"mas as saídas da última execução estão intactas.")
+                continue
+            print(f"❌ {nome}: entrada(s) ausente(s): {', '.join(ausentes)}")
+            salvar_estado(estado)
+            sys.exit(1)
+
+        print(f"🚀 {nome}: executando...")
+        inicio = time.perf_counter()
+        if not etapa.executar(etapa.configuracao()):
+            print(f"❌ {nome}: falhou.")
+            salvar_estado(estado)
+            sys.exit(1)
+
+        # Recalcula: a própria etapa pode ter tocado em entradas (ex: migrations)
+        estado["etapas"][nome] = {
+            "impressao": impressao_digital(etapa, hashes),
+            "saidas": {saida: hashes.hash(saida) for saida in etapa.saidas},
+            "executada_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duracao_segundos": round(time.perf_counter() - inicio, 3),
+        }
+        salvar_estado(estado)
+
+    if not argumentos.status:
+        salvar_estado(estado)
+    print(f"🎉 Pipeline concluído em {time.perf_counter() - inicio_total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Snapshot da tabela produtos: exportação e restauração em streaming.
+
+Hoje a única forma de popular outro ambiente é regenerar o
+``produtos_higienizados.json`` a partir do dump de vários GB do OFF e rodar o
+``init_db.py`` de novo. Este script copia o catálogo direto entre bancos:
+
+- **exportar**: ``COPY produtos TO STDOUT (FORMAT binary)`` → gzip → arquivo,
+  calculando o SHA-256 durante a escrita. Memória constante: os dados passam
+  em blocos, nunca são materializados em Python.
+- **restaurar**: confere o SHA-256, depois ``TRUNCATE`` + ``COPY FROM STDIN``
+  na mesma transação (tudo ou nada).
+
+Cada snapshot tem um manifesto ``.json`` ao lado com versão do formato,
+colunas, quantidade de linhas e o checksum.
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # No ambiente de origem
+    python scripts/snapshot_produtos.py exportar --arquivo produtos.snapshot.gz
+
+    # No ambiente de destino (após init_db.py aplicar as migrations)
+    python scripts/snapshot_produtos.py restaurar --arquivo produtos.snapshot.gz
+
+.. note::
+   A coluna gerada ``busca`` não entra no snapshot: o Postgres a recalcula
+   na restauração.
+
+.. warning::
+   ``restaurar`` apaga o conteúdo atual de ``produtos`` no banco da
+   ``DATABASE_URL``. Fora de ``PG_ENV=development`` exige ``--confirmar``.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+
+from init_db import load_database_url, get_connection, parse_db_url
+from medicao import formatar_bytes
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+SNAPSHOT_FILE = "produtos.snapshot.gz"
+VERSAO_FORMATO = 1
+TABELA = "produtos"
+
+# Colunas copiadas (a coluna gerada "busca" não aceita COPY FROM)
+COLUNAS = [
+    "id", "codigo_barras", "descricao", "marca", "tamanho", "imagem",
+    "preco_estimado", "criado_em", "atualizado_em", "cluster_id",
+]
+
+TAMANHO_BLOCO = 1024 * 1024
+NIVEL_COMPRESSAO = 6
+
+
+class EscritorComHash:
+    """
+    Envolve um arquivo binário e calcula o SHA-256 de tudo que é escrito.
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        with open("saida.gz", "wb") as f:
+            escritor = EscritorComHash(f)
+            escritor.write(b"dados")
+            print(escritor.sha256.hexdigest())
+    """
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.sha256 = hashlib.sha256()
+        self.bytes_escritos = 0
+
+    def write(self, dados: bytes) -> int:
+        self.sha256.update(dados)
+        self.bytes_escritos += len(dados)
+        return self.arquivo.write(dados)
+
+    def flush(self):
+        self.arquivo.flush()
+
+
+def caminho_manifesto(arquivo: str) -> str:
+    """Caminho do manifesto que acompanha o snapshot."""
+    return f"{arquivo}.json"
+
+
+def calcular_sha256(arquivo: str) -> str:
+    """Calcula o SHA-256 de um arquivo lendo em blocos."""
+    resumo = hashlib.sha256()
+    with open(arquivo, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def exportar(conn, arquivo: str) -> dict:
+    """
+    Exporta a tabela produtos para um snapshot comprimido.
+
+    :param conn: Conexão ativa com o banco
+    :param arquivo: Caminho do snapshot ``.gz``
+    :return: Manifesto gravado
+    """
+    sql = f"COPY {TABELA} ({', '.join(COLUNAS)}) TO STDOUT WITH (FORMAT binary)"
+    temporario = f"{arquivo}.tmp"
+
+    cur = conn.cursor()
+    with open(temporario, "wb") as f:
+        escritor = EscritorComHash(f)
+        with gzip.GzipFile(fileobj=escritor, mode="wb", compresslevel=NIVEL_COMPRESSAO) as gz:
+            cur.copy_expert(sql, gz, size=TAMANHO_BLOCO)
+    linhas = cur.rowcount
+    cur.close()
+    conn.rollback()  # Transação somente leitura: nada a confirmar
+    os.replace(temporario, arquivo)
+
+    manifesto = {
+        "versao": VERSAO_FORMATO,
+        "tabela": TABELA,
+        "colunas": COLUNAS,
+        "linhas": linhas,
+        "sha256": escritor.sha256.hexdigest(),
+        "bytes": escritor.bytes_escritos,
+        "criado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(caminho_manifesto(arquivo), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=2, ensure_ascii=False)
+    return manifesto
+
+
+def restaurar(conn, arquivo: str) -> dict:
+    """
+    Restaura um snapshot na tabela produtos, substituindo o conteúdo atual.
+
+    O checksum é conferido antes de tocar no banco. ``TRUNCATE`` e ``COPY``
+    rodam na mesma transação: se algo falhar, a tabela fica como estava.
+
+    :param conn: Conexão ativa com o banco
+    :param arquivo: Caminho do snapshot ``.gz``
+    :return: Manifesto do snapshot restaurado
+    """
+    with open(caminho_manifesto(arquivo), "r", encoding="utf-8") as f:
+        manifesto = json.load(f)
+
+    if manifesto.get("versao") != VERSAO_FORMATO:
+        print(f"❌ Versão de snapshot não suportada: {manifesto.get('versao')}")
+        sys.exit(1)
+
+    print("   🔐 Conferindo checksum...")
+    if calcular_sha256(arquivo) != manifesto["sha256"]:
+        print("❌ Checksum não confere. Snapshot corrompido ou incompleto.")
+        sys.exit(1)
+
+    sql = f"COPY {manifesto['tabela']} ({', '.join(manifesto['colunas'])}) FROM STDIN WITH (FORMAT binary)"
+    cur = conn.cursor()
+    try:
+        cur.execute(f"TRUNCATE {manifesto['tabela']}")
+        with gzip.open(arquivo, "rb") as gz:
+            cur.copy_expert(sql, gz, size=TAMANHO_BLOCO)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erro na restauração: {e}")
+        sys.exit(1)
+    finally:
+        cur.close()
+
+    return manifesto
+
+
+def main():
+    """Função principal: exportar ou restaurar o snapshot."""
+    parser = argparse.ArgumentParser(description="Snapshot da tabela produtos")
+    parser.add_argument("comando", choices=["exportar", "restaurar"])
+    parser.add_argument("--arquivo", default=SNAPSHOT_FILE, help="Caminho do snapshot .gz")
+    parser.add_argument(
+        "--confirmar", action="store_true",
+        help="Permite restaurar (TRUNCATE produtos) fora de PG_ENV=development",
+    )
+    argumentos = parser.parse_args()
+
+    if argumentos.comando == "restaurar" and not os.path.exists(argumentos.arquivo):
+        print(f"❌ Arquivo {argumentos.arquivo} não encontrado.")
+        sys.exit(1)
+
+    database_url = load_database_url()
+    if argumentos.comando == "restaurar" and os.getenv("PG_ENV") != "development" and not argumentos.confirmar:
+        destino = parse_db_url(database_url)
+        print(f"❌ restaurar apaga a tabela {TABELA} em {destino['host']}/{destino['database']}. "
+              f"Fora de PG_ENV=development, repita com --confirmar.")
+        sys.exit(1)
+
+    conn = get_connection(database_url)
+    inicio = time.perf_counter()
+
+    if argumentos.comando == "exportar":
+        print("📤 Exportando snapshot de produtos...")
+        manifesto = exportar(conn, argumentos.arquivo)
+    else:
+        print("📥 Restaurando snapshot de produtos...")
+        manifesto = restaurar(conn, argumentos.arquivo)
+
+    conn.close()
+    print(f"✅ {manifesto['linhas']:,} produtos, {formatar_bytes(manifesto['bytes'])} "
+          f"em {time.perf_counter() - inicio:.1f}s ({argumentos.arquivo})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Teste do verificar_imagens.py contra um stub HTTP local.
+
+Sobe um ``http.server`` no lugar de images.openfoodfacts.org e valida:
+imagem ok (com cache), reparo por outro idioma, anulação de URL morta,
+falha transitória (mantida e fora do índice), dataset de entrada intacto,
+cache na re-execução, fila de workers com mais URLs que a concorrência e
+``--revalidar-mortas`` restaurando a URL original.
+
+Uso: python scripts/testar_verificar_imagens.py
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import verificar_imagens  # noqa: E402
+
+URL_OK = f"{verificar_imagens.URL_BASE_OFF}/images/products/789/000/000/0001/front_pt.3.400.jpg"
+URL_REPARAVEL = f"{verificar_imagens.URL_BASE_OFF}/images/products/789/000/000/0002/front_pt.5.400.jpg"
+URL_MORTA = f"{verificar_imagens.URL_BASE_OFF}/images/products/789/000/000/0003/front_pt.1.400.jpg"
+URL_INSTAVEL = f"{verificar_imagens.URL_BASE_OFF}/images/products/789/000/000/0004/front_pt.2.400.jpg"
+
+
+class StubImagens(BaseHTTPRequestHandler):
+    """Servidor de imagens falso: ``rotas`` mapeia caminho → (status, corpo)."""
+
+    rotas = {}
+    requisicoes = []
+
+    def do_GET(self):
+        StubImagens.requisicoes.append(self.path)
+        status, corpo = StubImagens.rotas.get(self.path, (404, b""))
+        self.send_response(status)
+        self.send_header("Content-Type", "image/jpeg" if status == 200 else "text/plain")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def caminho(url: str) -> str:
+    return url[len(verificar_imagens.URL_BASE_OFF):]
+
+
+class TesteVerificarImagens(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio_original = os.getcwd()
+        self.temporario = tempfile.TemporaryDirectory()
+        os.chdir(self.temporario.name)
+
+        StubImagens.requisicoes = []
+        StubImagens.rotas = {
+            caminho(URL_OK): (200, b"imagem-1"),
+            caminho(URL_REPARAVEL).replace("front_pt", "front_en"): (200, b"imagem-2"),
+            caminho(URL_INSTAVEL): (503, b""),
+        }
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), StubImagens)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+
+        produtos = [
+            {"codigo_barras": str(i), "imagem": url}
+            for i, url in enumerate([URL_OK, URL_REPARAVEL, URL_MORTA, URL_INSTAVEL, None])
+        ]
+        with open("produtos.json", "w", encoding="utf-8") as f:
+            json.dump(produtos, f)
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        os.chdir(self.diretorio_original)
+        self.temporario.cleanup()
+
+    def processar(self, **kwargs) -> dict:
+        return verificar_imagens.processar(
+            "produtos.json", "verificados.json", self.base_url, concorrencia=4, **kwargs
+        )
+
+    def produtos(self, arquivo: str = "verificados.json") -> dict:
+        with open(arquivo, "r", encoding="utf-8") as f:
+            return {p["codigo_barras"]: p for p in json.load(f)}
+
+    def test_ok_reparo_anulacao_e_falha_transitoria(self):
+        resultado = self.processar()
+        produtos = self.produtos()
+
+        self.assertEqual(resultado["reparadas"], 1)
+        self.assertEqual(resultado["anuladas"], 1)
+        self.assertEqual(resultado["falhas"], 1)
+
+        self.assertEqual(produtos["0"]["imagem"], URL_OK)
+        self.assertNotIn("imagem_original", produtos["0"])
+        self.assertEqual(produtos["1"]["imagem"], URL_REPARAVEL.replace("front_pt", "front_en"))
+        self.assertEqual(produtos["1"]["imagem_original"], URL_REPARAVEL)
+        self.assertIsNone(produtos["2"]["imagem"])
+        self.assertEqual(produtos["2"]["imagem_original"], URL_MORTA)
+        self.assertEqual(produtos["3"]["imagem"], URL_INSTAVEL)
+        self.assertIsNone(produtos["4"]["imagem"])
+
+        # O dataset higienizado nunca é reescrito
+        self.assertEqual(self.produtos("produtos.json")["2"]["imagem"], URL_MORTA)
+        self.assertNotIn("imagem_original", self.produtos("produtos.json")["1"])
+
+        indice = verificar_imagens.carregar_indice()
+        self.assertNotIn(URL_INSTAVEL, indice)
+        self.assertTrue(os.path.exists(verificar_imagens.caminho_cache(indice[URL_OK]["sha256"])))
+
+    def test_reexecucao_usa_cache(self):
+        self.processar()
+        StubImagens.requisicoes = []
+
+        resultado = self.processar()
+
+        # Só a URL com falha transitória volta para a rede
+        self.assertEqual(resultado["pendentes"], 1)
+        self.assertEqual(StubImagens.requisicoes, [caminho(URL_INSTAVEL)])
+        self.assertIsNone(self.produtos()["2"]["imagem"])
+
+    def test_fila_com_mais_urls_que_workers(self):
+        produtos = []
+        for i in range(50):
+            url = f"{verificar_imagens.URL_BASE_OFF}/images/products/789/000/001/{i:04d}/front_pt.1.400.jpg"
+            StubImagens.rotas[caminho(url)] = (200, f"imagem-lote-{i % 10}".encode())
+            produtos.append({"codigo_barras": f"lote{i}", "imagem": url})
+        with open("produtos.json", "w", encoding="utf-8") as f:
+            json.dump(produtos, f)
+
+        resultado = self.processar()
+
+        self.assertEqual(resultado["falhas"], 0)
+        self.assertEqual(len(verificar_imagens.carregar_indice()), 50)
+        # 50 URLs, 10 conteúdos distintos: o cache guarda cada miniatura uma vez
+        arquivos = [n for _, _, nomes in os.walk(verificar_imagens.CACHE_DIR) for n in nomes if n.endswith(".jpg")]
+        self.assertEqual(len(arquivos), 10)
+
+    def test_revalidar_mortas_restaura_url_original(self):
+        self.processar()
+        StubImagens.rotas[caminho(URL_MORTA)] = (200, b"imagem-3")
+
+        self.assertIsNone(self.produtos()["2"]["imagem"])
+        self.processar(revalidar_mortas=True)
+
+        produto = self.produtos()["2"]
+        self.assertEqual(produto["imagem"], URL_MORTA)
+        self.assertNotIn("imagem_original", produto)
+
+
+if __name__ == "__main__":
+    unittest.main()
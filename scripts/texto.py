@@ -0,0 +1,33 @@
+"""
+Normalização de texto compartilhada pelos scripts de engenharia de dados.
+
+Autocomplete (``indice_autocomplete.py``) e detecção de duplicatas
+(``agrupar_duplicatas.py``) precisam comparar nomes de produto ignorando
+acentos e caixa; a regra fica aqui para que os dois usem exatamente a mesma.
+
+**Exemplo:**
+
+.. code-block:: python
+
+    from texto import dobrar_acentos
+
+    dobrar_acentos("Feijão Carioca")  # Output: 'feijao carioca'
+"""
+import unicodedata
+
+
+def dobrar_acentos(texto: str) -> str:
+    """
+    Remove acentos e converte para minúsculas.
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        dobrar_acentos("Açúcar Refinado")  # Output: 'acucar refinado'
+
+    :param texto: Texto original
+    :return: Texto sem acentos, em minúsculas
+    """
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
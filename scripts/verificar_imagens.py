@@ -0,0 +1,405 @@
+"""
+Verifica as URLs de imagem do catálogo higienizado e faz cache local das miniaturas.
+
+O ``clean_dataset.py`` apenas *deduz* a URL da imagem a partir da revisão em
+``images.selected.front`` — nada garante que o arquivo exista no servidor do
+OpenFoodFacts. Este script roda entre a higienização e o ``init_db.py``:
+
+1. Faz ``GET`` de cada URL ``imagem`` com um número fixo de workers
+   consumindo uma fila limitada e pool de conexões.
+2. Salva a miniatura de 400px em um cache local endereçado por conteúdo
+   (``cache_imagens/ab/abcdef...jpg``, onde o nome é o SHA-256 dos bytes).
+3. URLs mortas (404/410) são reparadas (tenta o mesmo ``rev`` em outros
+   idiomas) ou anuladas.
+4. Grava ``produtos_verificados.json`` com as URLs corrigidas (é o arquivo
+   importado pelo ``init_db.py``). A URL deduzida fica preservada em
+   ``imagem_original``. O ``produtos_higienizados.json`` nunca é alterado:
+   uma nova higienização não desfaz os reparos, basta verificar de novo
+   (as URLs já vistas saem do cache).
+
+O índice ``cache_imagens/indice.json`` guarda o resultado de cada URL e é
+salvo em lotes durante a verificação, então re-execuções (mesmo depois de uma
+interrupção) só consultam a rede para URLs novas (incremental).
+
+**Exemplo:**
+
+.. code-block:: bash
+
+    # Dentro do container, depois do clean_dataset.py
+    python scripts/verificar_imagens.py
+
+    # Apontando para um servidor local (testes/stub)
+    python scripts/verificar_imagens.py --base-url http://localhost:8000
+
+.. note::
+   URLs marcadas como mortas ficam no índice e não são consultadas de novo.
+   Use ``--revalidar-mortas`` para tentar novamente (a partir de
+   ``imagem_original``). Falhas transitórias (timeout, erro de conexão,
+   429, 5xx) não entram no índice: a URL é mantida e verificada na próxima
+   execução.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    print("❌ aiohttp não encontrado. Instale com: pip install aiohttp")
+    sys.exit(1)
+
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+DATASET_FILE = "produtos_higienizados.json"
+SAIDA_FILE = "produtos_verificados.json"
+CACHE_DIR = "cache_imagens"
+INDICE_FILE = "indice.json"
+
+URL_BASE_OFF = "https://images.openfoodfacts.org"
+
+# Requisições simultâneas (o OFF pede uso gentil dos servidores de imagem)
+CONCORRENCIA_PADRAO = 32
+TIMEOUT_SEGUNDOS = 15
+
+# Progresso salvo no índice a cada N URLs concluídas
+SALVAR_A_CADA = 1000
+
+# Só estes status indicam que a imagem não existe; o resto é transitório
+STATUS_HTTP_MORTA = (404, 410)
+
+# Idiomas candidatos para reparar URLs (mesma ordem de prioridade do clean_dataset)
+IDIOMAS_REPARO = ("pt", "en", "fr")
+
+REGEX_URL_FRONT = re.compile(r"/front_(?P<lang>[a-z]{2})\.(?P<rev>\d+)\.400\.jpg$")
+
+STATUS_OK = "ok"
+STATUS_MORTA = "morta"
+STATUS_FALHA = "falha"
+
+
+def caminho_cache(sha256: str) -> str:
+    """
+    Monta o caminho do arquivo no cache endereçado por conteúdo.
+
+    Usa os dois primeiros caracteres do hash como subpasta para não
+    concentrar centenas de milhares de arquivos em um único diretório.
+
+    :param sha256: Hash SHA-256 (hex) do conteúdo da imagem
+    :return: Caminho relativo do arquivo no cache
+    """
+    return os.path.join(CACHE_DIR, sha256[:2], f"{sha256}.jpg")
+
+
+def candidatas_reparo(url: str) -> list:
+    """
+    Gera URLs alternativas para uma imagem que não foi encontrada.
+
+    A revisão (``rev``) é mantida e apenas o idioma do ``front`` é trocado,
+    seguindo a prioridade de ``IDIOMAS_REPARO``.
+
+    **Exemplo:**
+
+    .. code-block:: python
+
+        candidatas_reparo(".../789/100/010/0016/front_pt.5.400.jpg")
+        # ['.../front_en.5.400.jpg', '.../front_fr.5.400.jpg']
+
+    :param url: URL original que falhou
+    :return: Lista de URLs alternativas (pode ser vazia)
+    """
+    match = REGEX_URL_FRONT.search(url)
+    if not match:
+        return []
+
+    prefixo = url[:match.start()]
+    rev = match.group("rev")
+    return [
+        f"{prefixo}/front_{lang}.{rev}.400.jpg"
+        for lang in IDIOMAS_REPARO
+        if lang != match.group("lang")
+    ]
+
+
+def trocar_base(url: str, base_url: str) -> str:
+    """
+    Substitui o host do OpenFoodFacts pela base informada (ex: stub local).
+
+    :param url: URL original
+    :param base_url: Nova base (sem barra final)
+    :return: URL com a base substituída
+    """
+    if base_url == URL_BASE_OFF or not url.startswith(URL_BASE_OFF):
+        return url
+    return base_url + url[len(URL_BASE_OFF):]
+
+
+def carregar_indice() -> dict:
+    """Carrega o índice de URLs já verificadas (vazio se não existir)."""
+    caminho = os.path.join(CACHE_DIR, INDICE_FILE)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def salvar_indice(indice: dict):
+    """Grava o índice de URLs verificadas (escrita atômica)."""
+    salvar_json_atomico(os.path.join(CACHE_DIR, INDICE_FILE), indice)
+
+
+def salvar_json_atomico(caminho: str, dados, indent=None):
+    """
+    Grava JSON em arquivo temporário e renomeia, evitando arquivo corrompido
+    se o processo for interrompido no meio da escrita.
+    """
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=indent, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def entrada_valida(entrada: dict, revalidar_mortas: bool) -> bool:
+    """
+    Decide se o resultado armazenado no índice pode ser reaproveitado.
+
+    :param entrada: Registro do índice para uma URL
+    :param revalidar_mortas: Se True, URLs mortas são consultadas de novo
+    :return: True se não precisa ir à rede
+    """
+    if entrada["status"] == STATUS_MORTA:
+        return not revalidar_mortas
+    # OK só é confiável se o arquivo ainda estiver no cache
+    return os.path.exists(caminho_cache(entrada["sha256"]))
+
+
+def gravar_cache(conteudo: bytes) -> str:
+    """
+    Grava uma miniatura no cache endereçado por conteúdo (se ainda não existir).
+
+    Bloqueante: dentro do event loop é chamada via ``asyncio.to_thread``.
+
+    :param conteudo: Bytes da imagem
+    :return: SHA-256 (hex) do conteúdo
+    """
+    sha256 = hashlib.sha256(conteudo).hexdigest()
+    destino = caminho_cache(sha256)
+    if not os.path.exists(destino):
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        # Sufixo por thread: dois workers podem baixar a mesma imagem ao mesmo tempo
+        temporario = f"{destino}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(conteudo)
+        os.replace(temporario, destino)
+    return sha256
+
+
+async def baixar(sessao, url: str, base_url: str):
+    """
+    Baixa uma URL e grava o conteúdo no cache.
+
+    :return: Tupla ``(status, sha256)``: ``STATUS_OK`` com o hash do conteúdo,
+        ``STATUS_MORTA`` para 404/410 ou ``STATUS_FALHA`` para erros transitórios
+    """
+    try:
+        async with sessao.get(trocar_base(url, base_url)) as resposta:
+            if resposta.status in STATUS_HTTP_MORTA:
+                return STATUS_MORTA, None
+            if resposta.status != 200:
+                return STATUS_FALHA, None
+            if not resposta.headers.get("Content-Type", "").startswith("image/"):
+                return STATUS_FALHA, None
+            conteudo = await resposta.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return STATUS_FALHA, None
+
+    if not conteudo:
+        return STATUS_FALHA, None
+
+    # Hash + escrita em disco fora do event loop
+    return STATUS_OK, await asyncio.to_thread(gravar_cache, conteudo)
+
+
+async def verificar_url(sessao, url: str, base_url: str) -> dict:
+    """
+    Verifica uma URL e, se estiver morta, tenta as candidatas de reparo.
+
+    Só segue para a próxima candidata quando a anterior respondeu 404/410;
+    uma falha transitória interrompe a verificação com ``STATUS_FALHA``
+    (sem reparar nem anular nada).
+
+    :return: Registro do índice (``status``, ``url_final``, ``sha256``)
+    """
+    for candidata in [url] + candidatas_reparo(url):
+        status, sha256 = await baixar(sessao, candidata, base_url)
+        if status == STATUS_OK:
+            return {"status": STATUS_OK, "url_final": candidata, "sha256": sha256}
+        if status == STATUS_FALHA:
+            return {"status": STATUS_FALHA, "url_final": url, "sha256": None}
+    return {"status": STATUS_MORTA, "url_final": None, "sha256": None}
+
+
+async def verificar_todas(urls: list, base_url: str, concorrencia: int, indice: dict) -> int:
+    """
+    Verifica as URLs em paralelo usando uma única sessão HTTP.
+
+    ``concorrencia`` workers consomem uma fila limitada: só existem
+    ``concorrencia`` corrotinas em voo, mesmo com centenas de milhares de
+    URLs. O ``TCPConnector`` reaproveita conexões keep-alive com o servidor
+    de imagens. Resultados definitivos (ok/morta) entram no ``indice``, que é
+    salvo em disco (fora do event loop) a cada ``SALVAR_A_CADA`` URLs concluídas.
+
+    :param urls: URLs a verificar
+    :param base_url: Base HTTP a usar no lugar do OpenFoodFacts
+    :param concorrencia: Número de workers (máximo de requisições simultâneas)
+    :param indice: Índice URL → registro, atualizado no lugar
+    :return: Quantidade de URLs com falha transitória (não gravadas no índice)
+    """
+    fila = asyncio.Queue(maxsize=concorrencia * 2)
+    conector = aiohttp.TCPConnector(limit=concorrencia, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT_SEGUNDOS)
+    concluidas = 0
+    falhas = 0
+
+    async with aiohttp.ClientSession(connector=conector, timeout=timeout) as sessao:
+        async def worker():
+            nonlocal concluidas, falhas
+            while True:
+                url = await fila.get()
+                if url is None:
+                    return
+                resultado = await verificar_url(sessao, url, base_url)
+                if resultado["status"] == STATUS_FALHA:
+                    falhas += 1
+                else:
+                    indice[url] = resultado
+
+                concluidas += 1
+                if concluidas % SALVAR_A_CADA == 0:
+                    # Cópia rasa: os workers continuam inserindo no índice
+                    await asyncio.to_thread(salvar_indice, dict(indice))
+                    print(f"   🔎 Verificadas: {concluidas}/{len(urls)}...")
+
+        workers = [asyncio.create_task(worker()) for _ in range(concorrencia)]
+        for url in urls:
+            await fila.put(url)
+        for _ in workers:
+            await fila.put(None)
+        await asyncio.gather(*workers)
+
+    salvar_indice(indice)
+    return falhas
+
+
+def aplicar_indice(produtos: list, indice: dict) -> dict:
+    """
+    Atualiza o campo ``imagem`` dos produtos conforme o índice.
+
+    A URL deduzida pelo ``clean_dataset`` é sempre a referência: quando a URL
+    final difere dela, fica guardada em ``imagem_original`` (assim uma URL
+    anulada pode ser revalidada depois). URLs sem resultado definitivo no
+    índice ficam como estão.
+
+    :param produtos: Produtos do dataset (alterados no lugar)
+    :param indice: Índice URL → registro
+    :return: Contadores ``reparadas`` e ``anuladas``
+    """
+    contadores = {"reparadas": 0, "anuladas": 0}
+    for produto in produtos:
+        original = produto.get("imagem_original") or produto.get("imagem")
+        if not original:
+            continue
+
+        entrada = indice.get(original)
+        url_final = entrada["url_final"] if entrada else original
+        if url_final is None:
+            contadores["anuladas"] += 1
+        elif url_final != original:
+            contadores["reparadas"] += 1
+
+        produto["imagem"] = url_final
+        if url_final == original:
+            produto.pop("imagem_original", None)
+        else:
+            produto["imagem_original"] = original
+
+    return contadores
+
+
+def processar(dataset_file: str, saida_file: str = SAIDA_FILE, base_url: str = URL_BASE_OFF,
+              concorrencia: int = CONCORRENCIA_PADRAO, revalidar_mortas: bool = False) -> dict:
+    """
+    Verifica as imagens do dataset, faz cache das miniaturas e grava o dataset corrigido.
+
+    :param dataset_file: JSON higienizado (somente leitura)
+    :param saida_file: JSON verificado (sempre regravado)
+    :param base_url: Base HTTP a usar no lugar do OpenFoodFacts
+    :param concorrencia: Máximo de requisições simultâneas
+    :param revalidar_mortas: Se True, URLs mortas são consultadas de novo
+    :return: Contadores ``pendentes``, ``falhas``, ``reparadas`` e ``anuladas``
+    """
+    with open(dataset_file, "r", encoding="utf-8") as f:
+        produtos = json.load(f)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    indice = carregar_indice()
+
+    urls = {p.get("imagem_original") or p.get("imagem") for p in produtos} - {None, ""}
+    pendentes = [
+        url for url in urls
+        if url not in indice or not entrada_valida(indice[url], revalidar_mortas)
+    ]
+    print(f"   📊 URLs únicas: {len(urls)} | Em cache: {len(urls) - len(pendentes)} | Pendentes: {len(pendentes)}")
+
+    falhas = 0
+    if pendentes:
+        inicio = time.time()
+        falhas = asyncio.run(verificar_todas(pendentes, base_url, concorrencia, indice))
+        print(f"   ⏱️ Verificação concluída em {time.time() - inicio:.1f}s")
+        if falhas:
+            print(f"   ⚠️ {falhas} URL(s) com falha transitória: mantidas e verificadas na próxima execução.")
+
+    contadores = aplicar_indice(produtos, indice)
+    salvar_json_atomico(saida_file, produtos, indent=2)
+
+    return {
+        "pendentes": len(pendentes),
+        "falhas": falhas,
+        "reparadas": contadores["reparadas"],
+        "anuladas": contadores["anuladas"],
+    }
+
+
+def main():
+    """Função principal: verifica, faz cache e corrige o dataset."""
+    parser = argparse.ArgumentParser(
+        description="Verificar URLs de imagem e fazer cache das miniaturas"
+    )
+    parser.add_argument("--dataset", default=DATASET_FILE, help="JSON higienizado")
+    parser.add_argument("--saida", default=SAIDA_FILE, help="JSON verificado (entrada do init_db.py)")
+    parser.add_argument("--base-url", default=URL_BASE_OFF, help="Base HTTP das imagens")
+    parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA_PADRAO)
+    parser.add_argument("--revalidar-mortas", action="store_true")
+    argumentos = parser.parse_args()
+
+    if not os.path.exists(argumentos.dataset):
+        print(f"❌ Arquivo {argumentos.dataset} não encontrado. Rode o clean_dataset.py antes.")
+        sys.exit(1)
+
+    print("🖼️ Iniciando verificação de imagens...")
+    resultado = processar(
+        argumentos.dataset, argumentos.saida, argumentos.base_url, argumentos.concorrencia, argumentos.revalidar_mortas
+    )
+    print(f"✅ Concluído! Reparadas: {resultado['reparadas']}, Anuladas: {resultado['anuladas']}. "
+          f"Dataset verificado em {argumentos.saida}")
+
+
+if __name__ == "__main__":
+    main()